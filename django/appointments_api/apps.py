@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppointmentsApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "appointments_api"
+
+    def ready(self):
+        from . import signals
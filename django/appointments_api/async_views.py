@@ -0,0 +1,295 @@
+import json
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from jwt_authentication.decorators import jwt_required, permission_required
+from .cache import cached_catalog_response
+from .idempotency import idempotent
+from .models import Service, Appointment
+from .pagination import decode_cursor, encode_cursor, estimated_count, page_limit
+from .slots import book_slot, is_slot_conflict, parse_scheduled_at, slot_conflict_response
+from .views import batch_ids, service_batch_response
+
+User = get_user_model()
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@jwt_required
+@permission_required('appointments_api.add_service')
+@idempotent
+async def create_service(request):
+    try:
+        data = json.loads(request.body)
+        name = data.get("name")
+        address = data.get("address")
+        doctor_id = data.get("doctor_id")
+        doctor = None
+        if doctor_id is not None:
+            doctor = await User.objects.filter(id=doctor_id).afirst()
+
+        if doctor is None:
+            return JsonResponse({
+                "error": "Data Invalid",
+                "message": f"Doctor not found",
+                "status": "not-found"
+            }, status=404)
+
+        service = await Service.objects.acreate(name=name, address=address, doctor=doctor)
+        return JsonResponse({
+            "service": {
+                "id": service.id, "name": service.name, "address": service.address,
+                "doctor": { "id": doctor.id, "username": doctor.username }
+            },
+            "status": "created"
+        }, status=201)
+    except (ValueError, ValidationError, IntegrityError) as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid request body: {e}",
+            "status": "bad-request"
+        }, status=400)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            "error": "Invalid JSON",
+            "message": "Invalid request body: Expecting valid JSON",
+            "status": "bad-request"
+        }, status=400)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@jwt_required
+@permission_required('appointments_api.view_service')
+@cached_catalog_response
+async def show_service(request, service_id):
+    try:
+        service = await Service.objects.select_related("doctor").aget(id=service_id)
+        return JsonResponse({
+            "service": {
+                "id": service.id, "name": service.name, "address": service.address,
+                "doctor": { "id": service.doctor.id, "username": service.doctor.username }
+            },
+            "status": "success"
+        }, status=200)
+    except Service.DoesNotExist:
+        return JsonResponse({
+            "error": "Not Found",
+            "message": f"Service not found with id {service_id}",
+            "status": "not-found"
+        }, status=404)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@jwt_required
+@permission_required('appointments_api.view_service')
+@cached_catalog_response
+async def show_all_services(request):
+    if "ids" in request.GET:
+        try:
+            ids = batch_ids(request)
+        except ValueError as e:
+            return JsonResponse({
+                "error": "Data Invalid",
+                "message": f"Invalid query parameters: {e}",
+                "status": "bad-request"
+            }, status=400)
+        services = await Service.objects.select_related("doctor").ain_bulk(ids)
+        return service_batch_response(ids, services)
+
+    services = Service.objects.select_related("doctor")
+    try:
+        limit = page_limit(request)
+        cursor = request.GET.get("cursor")
+        if cursor:
+            services = services.filter(id__gt=decode_cursor(cursor))
+    except ValueError as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid query parameters: {e}",
+            "status": "bad-request"
+        }, status=400)
+
+    services = [service async for service in services.order_by("id")[:limit + 1]]
+    next_cursor = encode_cursor(services[limit - 1].id) if len(services) > limit else None
+    data = {
+        "services": [
+            {
+                "id": service.id, "name": service.name, "address": service.address,
+                "doctor": { "id": service.doctor.id, "username": service.doctor.username }
+            } for service in services[:limit]
+        ],
+        "next": next_cursor,
+        "status": "success"
+    }
+    if request.GET.get("include_total") in ("1", "true"):
+        data["estimated_total"] = await sync_to_async(estimated_count)(Service)
+
+    return JsonResponse(data, status=200)
+
+@csrf_exempt
+@require_http_methods(["PUT"])
+@jwt_required
+@permission_required('appointments_api.change_service')
+async def update_service(request, service_id):
+    try:
+        service = await Service.objects.select_related("doctor").aget(id=service_id)
+
+        data = json.loads(request.body)
+        name = data.get("name")
+        address = data.get("address")
+        doctor_id = data.get("doctor_id")
+
+        if doctor_id is not None:
+            service.doctor = await User.objects.aget(id=doctor_id)
+
+        if name is not None:
+            service.name = name
+
+        if address is not None:
+            service.address = address
+
+        await service.asave()
+
+        return JsonResponse({
+            "service": {
+                "id": service_id, "name": service.name, "address": service.address,
+                "doctor": {"id": service.doctor.id, "username": service.doctor.username}
+            },
+            "status": "updated"
+        }, status=200)
+    except (ValueError, ValidationError, IntegrityError) as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid request body: {e}",
+            "status": "bad-request"
+        }, status=400)
+    except Service.DoesNotExist:
+        return JsonResponse({
+            "error": "Not Found",
+            "message": f"Service not found with id {service_id}",
+            "status": "not-found"
+        }, status=404)
+    except User.DoesNotExist:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Doctor not found",
+            "status": "not-found"
+        }, status=404)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            "error": "Invalid JSON",
+            "message": "Invalid request body: Expecting valid JSON",
+            "status": "bad-request"
+        }, status=400)
+
+@csrf_exempt
+@require_http_methods(["DELETE"])
+@jwt_required
+@permission_required('appointments_api.delete_service')
+async def delete_service(request, service_id):
+    try:
+        service = await Service.objects.aget(id=service_id)
+        await service.adelete()
+        return JsonResponse({
+            "service": {
+                "id": service_id, "name": service.name, "address": service.address,
+            },
+            "status": "deleted"
+        }, status=200)
+    except Service.DoesNotExist:
+        return JsonResponse({
+            "error": "Not Found",
+            "message": f"Service not found with id {service_id}",
+            "status": "not-found"
+        }, status=404)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@jwt_required
+@permission_required('appointments_api.add_appointment')
+@idempotent
+async def create_appointment(request):
+    try:
+        data = json.loads(request.body)
+        service_id = data.get("service_id")
+        scheduled_at = parse_scheduled_at(data.get("scheduled_at"))
+        service = await Service.objects.select_related("doctor").aget(id=service_id)
+
+        try:
+            appointment = await sync_to_async(book_slot)(
+                    scheduled_at=scheduled_at, service=service,
+                    doctor=service.doctor, patient=request.user)
+        except IntegrityError as e:
+            if not is_slot_conflict(e):
+                raise
+            return slot_conflict_response(service_id, scheduled_at)
+
+        return JsonResponse({
+            "appointment": {
+                "id": appointment.id, "scheduled_at": appointment.scheduled_at,
+                "service": { "id": service.id, "name": service.name, "address": service.address },
+                "doctor": { "id": service.doctor.id, "username": service.doctor.username },
+                "patient": { "id": request.user.id, "username": request.user.username }
+            },
+            "status": "created"
+        }, status=201)
+    except (ValueError, ValidationError, IntegrityError) as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid request body: {e}",
+            "status": "bad-request"
+        }, status=400)
+    except Service.DoesNotExist:
+        return JsonResponse({
+            "error": "Not Found",
+            "message": f"Service not found with id {service_id}",
+            "status": "not-found"
+        }, status=404)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            "error": "Invalid JSON",
+            "message": "Invalid request body: Expecting valid JSON",
+            "status": "bad-request"
+        }, status=400)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@jwt_required
+@permission_required('appointments_api.view_appointment')
+async def show_all_appointments(request):
+    appointments = Appointment.objects.filter(patient=request.user).select_related("service", "doctor")
+    return JsonResponse({
+        "appointments": [
+            {
+                "id": appointment.id, "scheduled_at": float(appointment.scheduled_at),
+                "service": { "id": appointment.service.id, "name": appointment.service.name, "address": appointment.service.address },
+                "doctor": { "id": appointment.doctor.id, "username": appointment.doctor.username },
+                "patient": { "id": request.user.id, "username": request.user.username }
+            } async for appointment in appointments
+        ],
+        "status": "success"
+    }, status=200)
+
+@csrf_exempt
+@require_http_methods(["DELETE"])
+@jwt_required
+@permission_required('appointments_api.delete_appointment')
+async def delete_appointment(request, appointment_id):
+    try:
+        appointment = await Appointment.objects.aget(id=appointment_id, patient=request.user)
+        await appointment.adelete()
+        return JsonResponse({
+            "appointments": {
+                    "id": appointment_id, "scheduled_at": float(appointment.scheduled_at),
+            },
+            "status": "deleted"
+        }, status=200)
+    except Appointment.DoesNotExist:
+        return JsonResponse({
+            "error": "Not Found",
+            "message": f"Appointment not found with id {appointment_id}",
+            "status": "not-found"
+        }, status=404)
@@ -0,0 +1,14 @@
+import logging
+
+logger = logging.getLogger("appointments_api.audit")
+
+def appointment_row(appointment):
+    return (appointment.id, appointment.doctor_id, appointment.patient_id, appointment.scheduled_at)
+
+def record_appointment_events(event, rows):
+    # runs on the background task executor, after the booking has committed
+    for appointment_id, doctor_id, patient_id, scheduled_at in rows:
+        logger.info(
+                "appointment %s %s: doctor=%s patient=%s scheduled_at=%s",
+                appointment_id, event, doctor_id, patient_id, scheduled_at,
+        )
@@ -0,0 +1,102 @@
+import math
+import threading
+import time
+from bisect import bisect_right, insort
+from heapq import merge
+from itertools import islice
+from django.conf import settings
+from jwt_authentication.cache import TTLCache
+from .models import Appointment
+
+def normalize(scheduled_at):
+    # same microsecond rounding as EpochMicrosecondsField, so values read back
+    # from the database compare equal to the ones seen in signals
+    return round(float(scheduled_at) * 1_000_000) / 1_000_000
+
+class DoctorSchedule:
+    # busy appointment start times for one doctor, kept sorted
+    def __init__(self, starts):
+        self.starts = sorted(normalize(start) for start in starts)
+        self._lock = threading.Lock()
+
+    def add(self, start):
+        start = normalize(start)
+        with self._lock:
+            insort(self.starts, start)
+
+    def remove(self, start):
+        start = normalize(start)
+        with self._lock:
+            index = bisect_right(self.starts, start) - 1
+            if index >= 0 and self.starts[index] == start:
+                del self.starts[index]
+
+    def free_slots(self, start, end, slot_length, duration, limit):
+        slots = []
+        candidate = math.ceil(start / slot_length) * slot_length
+        with self._lock:
+            while candidate + slot_length <= end and len(slots) < limit:
+                # first appointment that ends after the candidate slot begins
+                index = bisect_right(self.starts, candidate - duration)
+                if index < len(self.starts) and self.starts[index] < candidate + slot_length:
+                    candidate = math.ceil((self.starts[index] + duration) / slot_length) * slot_length
+                    continue
+
+                slots.append(candidate)
+                candidate += slot_length
+        return slots
+
+class AvailabilityIndex:
+    # bounded, since doctor ids come from clients
+    _schedules = TTLCache(
+            max_size=getattr(settings, 'AVAILABILITY_INDEX_SIZE', 1024),
+            ttl=getattr(settings, 'AVAILABILITY_INDEX_TTL', 60),
+    )
+
+    @staticmethod
+    def appointment_duration():
+        return getattr(settings, 'APPOINTMENT_DURATION', 30 * 60)
+
+    @staticmethod
+    def schedule_for(doctor_id):
+        schedule = AvailabilityIndex._schedules.get(doctor_id)
+        if schedule is None:
+            # past appointments can never block a future slot
+            horizon = time.time() - AvailabilityIndex.appointment_duration()
+            schedule = DoctorSchedule(
+                    Appointment.objects
+                    .filter(doctor_id=doctor_id, scheduled_at__gte=horizon)
+                    .values_list("scheduled_at", flat=True)
+            )
+            AvailabilityIndex._schedules.set(doctor_id, schedule)
+        return schedule
+
+    @staticmethod
+    def earliest_free_slots(doctor_ids, start, end, slot_length, limit):
+        start = max(start, time.time())
+        duration = AvailabilityIndex.appointment_duration()
+        per_doctor = [
+            [
+                (slot, doctor_id)
+                for slot in AvailabilityIndex.schedule_for(doctor_id).free_slots(
+                    start, end, slot_length, duration, limit
+                )
+            ] for doctor_id in doctor_ids
+        ]
+        return list(islice(merge(*per_doctor), limit))
+
+    @staticmethod
+    def appointment_added(doctor_id, scheduled_at):
+        schedule = AvailabilityIndex._schedules.get(doctor_id)
+        if schedule is not None:
+            schedule.add(scheduled_at)
+
+    @staticmethod
+    def appointment_removed(doctor_id, scheduled_at):
+        schedule = AvailabilityIndex._schedules.get(doctor_id)
+        if schedule is not None:
+            schedule.remove(scheduled_at)
+
+    @staticmethod
+    def clear():
+        AvailabilityIndex._schedules.clear()
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+
+class ServiceCatalogCache:
+    LIST_GENERATION_KEY = 'appointments_api:services:generation'
+    _lock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def backend():
+        return caches[getattr(settings, 'SERVICES_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def ttl():
+        return getattr(settings, 'SERVICES_CACHE_TTL', 60)
+
+    @staticmethod
+    def detail_key(service_id):
+        return f'appointments_api:services:detail:{service_id}'
+
+    @staticmethod
+    def list_key(generation, request):
+        params = "&".join(f"{key}={value}" for key, value in sorted(request.GET.items()))
+        # keyed by endpoint too: listing and search take the same parameters;
+        # hashed since search terms are free text and must not end up in the raw key
+        digest = hashlib.sha256(f"{request.path}?{params}".encode()).hexdigest()
+        return f'appointments_api:services:list:{generation}:{digest}'
+
+    @staticmethod
+    def list_generation():
+        backend = ServiceCatalogCache.backend()
+        generation = backend.get(ServiceCatalogCache.LIST_GENERATION_KEY)
+        if generation is None:
+            # seeded from the clock so a flushed key never revives old list entries
+            backend.add(ServiceCatalogCache.LIST_GENERATION_KEY, time.time_ns(), timeout=None)
+            generation = backend.get(ServiceCatalogCache.LIST_GENERATION_KEY)
+        return generation
+
+    @staticmethod
+    def key_for(request, kwargs):
+        if "service_id" in kwargs:
+            return ServiceCatalogCache.detail_key(kwargs["service_id"])
+        return ServiceCatalogCache.list_key(ServiceCatalogCache.list_generation(), request)
+
+    @staticmethod
+    def invalidate_services(service_ids):
+        def invalidate():
+            ServiceCatalogCache.backend().delete_many(
+                    [ServiceCatalogCache.detail_key(service_id) for service_id in service_ids]
+            )
+            try:
+                ServiceCatalogCache.backend().incr(ServiceCatalogCache.LIST_GENERATION_KEY)
+            except ValueError:
+                # nothing cached yet
+                pass
+
+        invalidate()
+        # a concurrent request may cache the old rows before the writer commits
+        transaction.on_commit(invalidate)
+
+    @staticmethod
+    def record(hit):
+        with ServiceCatalogCache._lock:
+            if hit:
+                ServiceCatalogCache.hits += 1
+            else:
+                ServiceCatalogCache.misses += 1
+
+    @staticmethod
+    def stats():
+        with ServiceCatalogCache._lock:
+            lookups = ServiceCatalogCache.hits + ServiceCatalogCache.misses
+            return {
+                "hits": ServiceCatalogCache.hits,
+                "misses": ServiceCatalogCache.misses,
+                "hit_ratio": ServiceCatalogCache.hits / lookups if lookups else 0.0,
+                "ttl": ServiceCatalogCache.ttl(),
+            }
+
+def cached_catalog_response(view_func):
+    def response_from(content):
+        return HttpResponse(content, content_type="application/json", status=200)
+
+    def cacheable(response):
+        return response.status_code == 200 and not response.streaming
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            key = ServiceCatalogCache.key_for(request, kwargs)
+            content = await ServiceCatalogCache.backend().aget(key)
+            ServiceCatalogCache.record(content is not None)
+            if content is not None:
+                return response_from(content)
+
+            response = await view_func(request, *args, **kwargs)
+            if cacheable(response):
+                await ServiceCatalogCache.backend().aset(key, response.content, ServiceCatalogCache.ttl())
+            return response
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = ServiceCatalogCache.key_for(request, kwargs)
+        content = ServiceCatalogCache.backend().get(key)
+        ServiceCatalogCache.record(content is not None)
+        if content is not None:
+            return response_from(content)
+
+        response = view_func(request, *args, **kwargs)
+        if cacheable(response):
+            ServiceCatalogCache.backend().set(key, response.content, ServiceCatalogCache.ttl())
+        return response
+    return wrapper
@@ -0,0 +1,41 @@
+import math
+from django.core.exceptions import ValidationError
+from django.db import models
+
+BIGINT_MIN, BIGINT_MAX = -2 ** 63, 2 ** 63 - 1
+
+def epoch_microseconds(value):
+    seconds = float(value)
+    if not math.isfinite(seconds):
+        raise ValueError(f"{value!r} is not a finite number of seconds")
+    microseconds = round(seconds * 1_000_000)
+    if not BIGINT_MIN <= microseconds <= BIGINT_MAX:
+        raise ValueError(f"{value!r} is out of range for a 64-bit microsecond timestamp")
+    return microseconds
+
+class EpochMicrosecondsField(models.BigIntegerField):
+    # reads and writes float epoch seconds, stored as integer microseconds so
+    # range filters and ordering are plain integer comparisons
+    description = "Epoch seconds stored as integer microseconds"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return value / 1_000_000
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages["invalid"],
+                code="invalid",
+                params={"value": value},
+            )
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        return epoch_microseconds(value)
@@ -0,0 +1,169 @@
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from .models import IdempotencyKey
+
+class IdempotencyStore:
+    _lock = threading.Lock()
+    _last_purge = 0.0
+
+    @staticmethod
+    def fingerprint(request):
+        digest = hashlib.sha256()
+        for part in (request.method.encode(), request.path.encode(), request.body):
+            digest.update(part)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def reserve(user, key, fingerprint):
+        # a retry costs one indexed lookup; only the first request inserts
+        IdempotencyStore.maybe_purge()
+        expires_at = timezone.now() + timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 3600))
+        record, created = IdempotencyKey.objects.get_or_create(
+                user=user, key=key, defaults={"fingerprint": fingerprint, "expires_at": expires_at}
+        )
+        if not created and record.expires_at <= timezone.now():
+            record.delete()
+            return IdempotencyStore.reserve(user, key, fingerprint)
+        if not created and IdempotencyStore.reclaimable(record, fingerprint):
+            return record, True
+        return record, created
+
+    @staticmethod
+    def reclaimable(record, fingerprint):
+        # a reservation still pending after the lease belongs to a request whose
+        # process died; a retry of the same request takes it over. The
+        # conditional update lets only one of several concurrent retries win.
+        lease = timedelta(seconds=getattr(settings, "IDEMPOTENCY_IN_PROGRESS_LEASE", 30))
+        now = timezone.now()
+        if record.status_code is not None or record.fingerprint != fingerprint or record.reserved_at > now - lease:
+            return False
+        reclaimed = IdempotencyKey.objects.filter(
+                id=record.id, status_code__isnull=True, reserved_at=record.reserved_at
+        ).update(reserved_at=now)
+        record.reserved_at = now
+        return bool(reclaimed)
+
+    @staticmethod
+    def complete(record, response):
+        if response.status_code >= 500 or response.streaming:
+            # let the client retry for real
+            record.delete()
+            return
+        record.status_code = response.status_code
+        record.body = response.content
+        record.save(update_fields=["status_code", "body"])
+
+    @staticmethod
+    def purge_expired(batch_size=None, max_batches=None):
+        # bounded deletes keep each write transaction (and lock) short
+        batch_size = batch_size or getattr(settings, "IDEMPOTENCY_PURGE_BATCH_SIZE", 1000)
+        purged = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = list(
+                    IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+                    .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            purged += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+            batches += 1
+        return purged
+
+    @staticmethod
+    def maybe_purge():
+        interval = getattr(settings, "IDEMPOTENCY_PURGE_INTERVAL", 60)
+        with IdempotencyStore._lock:
+            if time.monotonic() - IdempotencyStore._last_purge < interval:
+                return
+            IdempotencyStore._last_purge = time.monotonic()
+        # one batch per interval; purge_idempotency_keys clears a backlog
+        IdempotencyStore.purge_expired(max_batches=1)
+
+def invalid_idempotency_key_response(message, status):
+    return JsonResponse({
+        "error": "Idempotency Key Invalid",
+        "message": message,
+        "status": "conflict" if status == 409 else "bad-request"
+    }, status=status)
+
+def replay(record):
+    response = HttpResponse(bytes(record.body), content_type="application/json", status=record.status_code)
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+def check_reservation(record, created, fingerprint):
+    if created:
+        return None
+    if record.fingerprint != fingerprint:
+        return invalid_idempotency_key_response("Idempotency-Key was already used for a different request", 422)
+    if record.status_code is None:
+        response = invalid_idempotency_key_response("a request with this Idempotency-Key is still in progress", 409)
+        response.headers["Retry-After"] = "1"
+        return response
+    return replay(record)
+
+def idempotent(view_func):
+    # place below jwt_required: keys are scoped to the authenticated user
+    def key_for(request):
+        key = request.headers.get("Idempotency-Key")
+        if key is not None and not 0 < len(key) <= 255:
+            raise ValueError("Idempotency-Key must be 1 to 255 characters")
+        return key
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            try:
+                key = key_for(request)
+            except ValueError as e:
+                return invalid_idempotency_key_response(str(e), 400)
+            if key is None:
+                return await view_func(request, *args, **kwargs)
+
+            fingerprint = IdempotencyStore.fingerprint(request)
+            record, created = await sync_to_async(IdempotencyStore.reserve)(request.user, key, fingerprint)
+            response = check_reservation(record, created, fingerprint)
+            if response is not None:
+                return response
+
+            try:
+                response = await view_func(request, *args, **kwargs)
+            except BaseException:
+                await record.adelete()
+                raise
+            await sync_to_async(IdempotencyStore.complete)(record, response)
+            return response
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            key = key_for(request)
+        except ValueError as e:
+            return invalid_idempotency_key_response(str(e), 400)
+        if key is None:
+            return view_func(request, *args, **kwargs)
+
+        fingerprint = IdempotencyStore.fingerprint(request)
+        record, created = IdempotencyStore.reserve(request.user, key, fingerprint)
+        response = check_reservation(record, created, fingerprint)
+        if response is not None:
+            return response
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except BaseException:
+            record.delete()
+            raise
+        IdempotencyStore.complete(record, response)
+        return response
+    return wrapper
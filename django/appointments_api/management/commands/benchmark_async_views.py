@@ -0,0 +1,93 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from appointments_api.models import Service
+from appointments_api.seeders import PermissionSeeder
+from jwt_authentication.utils import JWTUtils
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = (
+        'Compare services listing throughput through the sync (WSGI) and async (ASGI) '
+        'request handlers, in-process, against a throwaway test database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--services', type=int, default=50)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            headers = self.seed(options['services'])
+            results = [
+                ('sync  wsgi', self.run_sync(reverse('show_all_services'), headers, options)),
+                ('async asgi', self.run_async(reverse('async_show_all_services'), headers, options)),
+            ]
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f'{options["requests"]} requests, concurrency {options["concurrency"]}, '
+            f'{options["services"]} services per response'
+        )
+        for label, (elapsed, errors) in results:
+            self.stdout.write(
+                f'{label}: {options["requests"] / elapsed:8.1f} req/s '
+                f'({elapsed:.2f}s, {errors} errors)'
+            )
+
+    def seed(self, service_count):
+        _, doctor_group, patient_group = PermissionSeeder.seed_all()["groups"]
+        doctor = User.objects.create_user(username='benchmark_doctor')
+        doctor.groups.add(doctor_group)
+        patient = User.objects.create_user(username='benchmark_patient')
+        patient.groups.add(patient_group)
+        Service.objects.bulk_create([
+            Service(name=f'service{i}', address='New Jersey', doctor=doctor)
+            for i in range(service_count)
+        ])
+        return { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+
+    def run_sync(self, path, headers, options):
+        def fetch(_):
+            try:
+                return Client().get(path, headers=headers).status_code
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            statuses = list(executor.map(fetch, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        return elapsed, sum(1 for status in statuses if status != 200)
+
+    def run_async(self, path, headers, options):
+        async def fetch_all():
+            semaphore = asyncio.Semaphore(options['concurrency'])
+            client = AsyncClient()
+
+            async def fetch():
+                async with semaphore:
+                    return (await client.get(path, headers=headers)).status_code
+
+            return await asyncio.gather(*(fetch() for _ in range(options['requests'])))
+
+        started = time.perf_counter()
+        statuses = async_to_sync(fetch_all)()
+        elapsed = time.perf_counter() - started
+
+        return elapsed, sum(1 for status in statuses if status != 200)
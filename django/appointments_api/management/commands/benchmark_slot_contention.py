@@ -0,0 +1,157 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from jwt_authentication.utils import JWTUtils
+from appointments_api.models import Service, Appointment
+from appointments_api.seeders import PermissionSeeder
+from .load_test import percentile
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = (
+        'Book the same slot from many threads at once against a throwaway database; '
+        'fails unless every slot is won exactly once and every other attempt gets a 409'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--slots', type=int, default=20, help='slots contended one after another')
+        parser.add_argument('--start', type=float, default=4_000_000_000,
+                            help='epoch seconds of the first contended slot')
+        parser.add_argument('--slot-length', type=int, default=30 * 60)
+        parser.add_argument('--json', action='store_true', help='print the report as JSON')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 2 or options['slots'] < 1:
+            raise CommandError('--threads must be at least 2 and --slots positive')
+        self.options = options
+
+        # a file rather than shared-cache memory, so threads really race on
+        # the database instead of failing with "table is locked"
+        scratch = tempfile.mkdtemp()
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        if connection.vendor == "sqlite":
+            test_settings["NAME"] = str(Path(scratch) / "slot_contention.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            service, headers = self.seed()
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                samples, elapsed = self.run(service, headers)
+            booked = Counter(Appointment.objects.filter(service=service).values_list("scheduled_at", flat=True))
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        report = self.report(samples, elapsed, booked)
+        if options['json']:
+            self.stdout.write(json.dumps(report, sort_keys=True))
+        else:
+            self.print_report(report)
+        if not report["correct"]:
+            raise CommandError('slot contention produced double bookings, lost slots or unexpected errors')
+
+    def seed(self):
+        _, doctor_group, patient_group = PermissionSeeder.seed_all()["groups"]
+        doctor = User.objects.create_user(username='contention_doctor')
+        doctor.groups.add(doctor_group)
+        service = Service.objects.create(name='Contended service', address='Anywhere', doctor=doctor)
+
+        headers = []
+        for index in range(self.options['threads']):
+            patient = User.objects.create_user(username=f'contention_patient_{index}')
+            patient.groups.add(patient_group)
+            patient = User.objects.get(id=patient.id)
+            headers.append({"Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}"})
+        return service, headers
+
+    def run(self, service, headers):
+        barrier = threading.Barrier(len(headers))
+        lock = threading.Lock()
+        samples = []
+        url = reverse("create_appointment")
+
+        def contend(auth):
+            client = Client()
+            try:
+                for slot in range(self.options['slots']):
+                    body = json.dumps({
+                        "scheduled_at": self.options['start'] + slot * self.options['slot_length'],
+                        "service_id": service.id,
+                    })
+                    # every thread fires at the same slot together
+                    barrier.wait()
+                    started = time.perf_counter()
+                    status = client.post(url, body, content_type="application/json", headers=auth).status_code
+                    latency = time.perf_counter() - started
+                    with lock:
+                        samples.append((slot, status, latency))
+            except threading.BrokenBarrierError:
+                pass
+            except Exception:
+                barrier.abort()
+                raise
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=contend, args=(auth,)) for auth in headers]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples, time.perf_counter() - started
+
+    def report(self, samples, elapsed, booked):
+        statuses = Counter(str(status) for _, status, _ in samples)
+        winners = Counter(slot for slot, status, _ in samples if status == 201)
+        latencies = sorted(latency for _, _, latency in samples)
+        expected = self.options['threads'] * self.options['slots']
+        double_booked = sum(1 for count in booked.values() if count > 1)
+        return {
+            "threads": self.options['threads'],
+            "slots": self.options['slots'],
+            "attempts": len(samples),
+            "elapsed": elapsed,
+            "throughput": len(samples) / elapsed if elapsed else 0.0,
+            "status_codes": dict(statuses),
+            "slots_won": len(winners),
+            "double_booked": double_booked,
+            "latency_ms": {
+                "p50": percentile(latencies, 0.50) * 1000 if latencies else None,
+                "p95": percentile(latencies, 0.95) * 1000 if latencies else None,
+                "max": latencies[-1] * 1000 if latencies else None,
+            },
+            "correct": (
+                len(samples) == expected
+                and all(count == 1 for count in winners.values())
+                and len(winners) == len(booked) == self.options['slots']
+                and not double_booked
+                and statuses.get("201", 0) + statuses.get("409", 0) == expected
+            ),
+        }
+
+    def print_report(self, report):
+        latency = report["latency_ms"]
+        self.stdout.write(
+                f'{report["attempts"]} bookings of {report["slots"]} slots by {report["threads"]} threads '
+                f'in {report["elapsed"]:.2f}s: {report["throughput"]:.1f} req/s, '
+                f'p50 {latency["p50"]:.1f}ms, p95 {latency["p95"]:.1f}ms'
+        )
+        self.stdout.write(
+                f'status codes {report["status_codes"]}, {report["slots_won"]} slots won, '
+                f'{report["double_booked"]} double-booked'
+        )
+        if report["correct"]:
+            self.stdout.write(self.style.SUCCESS('Every slot was booked exactly once'))
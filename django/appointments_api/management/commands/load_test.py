@@ -0,0 +1,284 @@
+import http.client
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from io import StringIO
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection, connections
+from django.test.utils import override_settings
+from appointments_api.models import Service
+
+User = get_user_model()
+
+DEFAULT_MIX = "login=1,list_services=6,create_appointment=2,list_appointments=2,delete_appointment=1"
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class Worker:
+    # one simulated client: logs in as its own patient, then runs the mix
+    def __init__(self, command, index, username):
+        self.command = command
+        self.options = command.options
+        self.random = random.Random(self.options['seed'] + index)
+        self.username = username
+        self.token = None
+        self.created = []
+        # a slot range of its own, so workers never book the same instant
+        self.next_slot = self.options['start'] + index * 1_000_000 * self.options['slot_length']
+
+    def request(self, method, path, body=None, authenticated=True):
+        headers = {"Content-Type": "application/json", "Host": "127.0.0.1"}
+        if authenticated and self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        client = http.client.HTTPConnection("127.0.0.1", self.command.port, timeout=self.options['timeout'])
+        try:
+            client.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = client.getresponse()
+            return response.status, response.read()
+        finally:
+            client.close()
+
+    def login(self):
+        status, content = self.request(
+                "POST", "/api/login", {"username": self.username, "password": self.options['password']},
+                authenticated=False,
+        )
+        if status == 200:
+            self.token = json.loads(content)["access_token"]
+        return status
+
+    def list_services(self):
+        return self.request("GET", f"/api/services/?limit={self.options['page_size']}")[0]
+
+    def create_appointment(self):
+        self.next_slot += self.options['slot_length']
+        status, content = self.request("POST", "/api/appointments/create", {
+            "scheduled_at": self.next_slot, "service_id": self.random.choice(self.command.service_ids),
+        })
+        if status == 201:
+            self.created.append(json.loads(content)["appointment"]["id"])
+        return status
+
+    def list_appointments(self):
+        return self.request("GET", "/api/appointments/")[0]
+
+    def delete_appointment(self):
+        appointment_id = self.created.pop(self.random.randrange(len(self.created)))
+        return self.request("DELETE", f"/api/appointments/{appointment_id}/delete")[0]
+
+    def run(self, deadline, remaining):
+        operations, weights = zip(*self.command.mix.items())
+        self.command.record("login", *self.timed(self.login))
+        while time.monotonic() < deadline and remaining():
+            operation = self.random.choices(operations, weights=weights)[0]
+            if operation == "delete_appointment" and not self.created:
+                # nothing of ours to cancel yet; book one so the mix stays balanced
+                operation = "create_appointment"
+            self.command.record(operation, *self.timed(getattr(self, operation)))
+
+    def timed(self, operation):
+        started = time.perf_counter()
+        try:
+            status = operation()
+        except (OSError, http.client.HTTPException) as e:
+            status = type(e).__name__
+        return status, time.perf_counter() - started
+
+class Command(BaseCommand):
+    help = (
+        'Serve health_linkr.wsgi.application from a local threaded server and drive a '
+        'weighted mix of API calls with concurrent workers; writes a JSON report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+        parser.add_argument('--requests', type=int, default=0, help='stop after N requests (0: no limit)')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f'comma-separated operation=weight pairs (default: {DEFAULT_MIX})')
+        parser.add_argument('--prefix', default='load', help='seed_load_data prefix of the patient accounts')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--seed-database', action='store_true',
+                            help='run against a throwaway database filled by seed_load_data')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--start', type=float, default=4_000_000_000,
+                            help='epoch seconds of the first slot booked by the test')
+        parser.add_argument('--slot-length', type=int, default=30 * 60)
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='load_report.json')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.mix = self.parse_mix(options['mix'])
+        self.lock = threading.Lock()
+        self.results = defaultdict(list)
+
+        old_name = None
+        self.scratch = None
+        if options['seed_database']:
+            old_name = self.create_seeded_database()
+        try:
+            usernames = list(
+                    User.objects.filter(username__startswith=f"{options['prefix']}_patient_")
+                    .order_by("id").values_list("username", flat=True)[:options['workers']]
+            )
+            self.service_ids = list(Service.objects.order_by("id").values_list("id", flat=True)[:10_000])
+            if not usernames or not self.service_ids:
+                raise CommandError(
+                        f'no "{options["prefix"]}_patient_*" users or no services; '
+                        f'run seed_load_data first or pass --seed-database'
+                )
+
+            with override_settings(ALLOWED_HOSTS=["127.0.0.1"]):
+                elapsed = self.run(usernames)
+        finally:
+            connections.close_all()
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            if self.scratch is not None:
+                shutil.rmtree(self.scratch, ignore_errors=True)
+
+        report = self.report(elapsed, len(usernames))
+        Path(options['output']).write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        self.print_report(report)
+
+    def parse_mix(self, mix):
+        operations = {}
+        for item in filter(None, mix.split(",")):
+            name, _, weight = item.partition("=")
+            if name not in ("login", "list_services", "create_appointment", "list_appointments", "delete_appointment"):
+                raise CommandError(f'unknown operation {name!r} in --mix')
+            try:
+                operations[name] = float(weight or 1)
+            except ValueError:
+                raise CommandError(f'invalid weight {weight!r} for {name!r} in --mix')
+        if not any(operations.values()):
+            raise CommandError('--mix needs at least one operation with a positive weight')
+        return operations
+
+    def create_seeded_database(self):
+        # a file rather than shared-cache memory, so server threads write concurrently
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+            self.scratch = tempfile.mkdtemp()
+            test_settings["NAME"] = str(Path(self.scratch) / "load_test.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        call_command(
+                "seed_load_data", patients=max(self.options['workers'], 1), doctors=10, services=200,
+                appointments=5_000, prefix=self.options['prefix'], password=self.options['password'],
+                seed=self.options['seed'], stdout=self.stdout if self.options['verbosity'] > 1 else StringIO(),
+        )
+        return old_name
+
+    def run(self, usernames):
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietRequestHandler, allow_reuse_address=True)
+        from health_linkr.wsgi import application
+        server.set_app(application)
+        self.port = server.server_address[1]
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+
+        budget = self.options['requests']
+        issued = [0]
+
+        def remaining():
+            if not budget:
+                return True
+            with self.lock:
+                issued[0] += 1
+                return issued[0] <= budget
+
+        workers = [Worker(self, index, username) for index, username in enumerate(usernames)]
+        deadline = time.monotonic() + self.options['duration']
+        threads = [threading.Thread(target=worker.run, args=(deadline, remaining)) for worker in workers]
+
+        started = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            elapsed = time.perf_counter() - started
+            server.shutdown()
+            server.server_close()
+        return elapsed
+
+    def record(self, operation, status, latency):
+        with self.lock:
+            self.results[operation].append((status, latency))
+
+    def report(self, elapsed, workers):
+        endpoints = {}
+        for operation, samples in sorted(self.results.items()):
+            latencies = sorted(latency for _, latency in samples)
+            statuses = defaultdict(int)
+            for status, _ in samples:
+                statuses[str(status)] += 1
+            errors = sum(
+                    count for status, count in statuses.items()
+                    if not status.isdigit() or int(status) >= 400
+            )
+            endpoints[operation] = {
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": errors / len(samples),
+                "throughput": len(samples) / elapsed,
+                "status_codes": dict(statuses),
+                "latency_ms": {
+                    "mean": sum(latencies) / len(latencies) * 1000,
+                    "p50": percentile(latencies, 0.50) * 1000,
+                    "p95": percentile(latencies, 0.95) * 1000,
+                    "p99": percentile(latencies, 0.99) * 1000,
+                    "max": latencies[-1] * 1000,
+                },
+            }
+
+        total = sum(endpoint["requests"] for endpoint in endpoints.values())
+        errors = sum(endpoint["errors"] for endpoint in endpoints.values())
+        return {
+            "config": {
+                "workers": workers, "duration": self.options['duration'], "requests": self.options['requests'],
+                "mix": self.mix, "seeded_database": self.options['seed_database'],
+            },
+            "elapsed": elapsed,
+            "total": {
+                "requests": total,
+                "errors": errors,
+                "error_rate": errors / total if total else 0.0,
+                "throughput": total / elapsed if elapsed else 0.0,
+            },
+            "endpoints": endpoints,
+        }
+
+    def print_report(self, report):
+        total = report["total"]
+        self.stdout.write(
+                f'{total["requests"]} requests in {report["elapsed"]:.1f}s with {report["config"]["workers"]} workers: '
+                f'{total["throughput"]:.1f} req/s, {total["error_rate"]:.1%} errors'
+        )
+        for operation, endpoint in report["endpoints"].items():
+            latency = endpoint["latency_ms"]
+            self.stdout.write(
+                    f'  {operation:<19} {endpoint["requests"]:>7} req {endpoint["throughput"]:8.1f} req/s  '
+                    f'p50 {latency["p50"]:7.1f}ms  p95 {latency["p95"]:7.1f}ms  p99 {latency["p99"]:7.1f}ms  '
+                    f'{endpoint["error_rate"]:6.1%} errors'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Report written to {self.options["output"]}'))
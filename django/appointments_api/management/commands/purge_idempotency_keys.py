@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from appointments_api.idempotency import IdempotencyStore
+
+class Command(BaseCommand):
+    help = 'Delete expired Idempotency-Key records in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        purged = IdempotencyStore.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired idempotency keys'))
@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from appointments_api.search import ServiceSearch
+
+class Command(BaseCommand):
+    help = 'Rebuild the services full-text search index from the services table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-optimize', action='store_true',
+                            help='skip merging the index b-trees after the rebuild')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if not ServiceSearch.available():
+            self.stdout.write(self.style.WARNING('Full-text search index is only maintained on SQLite; nothing to do'))
+            return
+
+        ServiceSearch.rebuild(optimize=not options['no_optimize'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt services search index in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,140 @@
+import random
+import time
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from appointments_api.models import Service, Appointment
+from appointments_api.seeders import PermissionSeeder
+
+User = get_user_model()
+
+STREETS = ['Main St', 'Oak Ave', 'Pine Rd', 'Maple Dr', 'Cedar Ln', 'Elm St', 'Park Ave', 'Lake Rd']
+CITIES = ['New Jersey', 'Boston', 'Chicago', 'Denver', 'Austin', 'Seattle', 'Portland', 'Miami']
+SPECIALTIES = ['General Checkup', 'Dental Cleaning', 'Cardiology', 'Dermatology', 'Physiotherapy',
+               'Pediatrics', 'Vaccination', 'Eye Exam', 'Nutrition', 'Orthopedics']
+
+class Command(BaseCommand):
+    help = 'Generate deterministic users, doctors, services and appointments at load-test scale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=10_000)
+        parser.add_argument('--doctors', type=int, default=500)
+        parser.add_argument('--services', type=int, default=2_000)
+        parser.add_argument('--appointments', type=int, default=1_000_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='load')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--batch-size', type=int, default=1_000,
+                            help='rows per INSERT statement')
+        parser.add_argument('--chunk-size', type=int, default=50_000,
+                            help='rows per transaction')
+        parser.add_argument('--start', type=float, default=None,
+                            help='epoch seconds of the first appointment slot (default: now, on the hour)')
+        parser.add_argument('--slot-length', type=int, default=30 * 60)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.random = random.Random(options['seed'])
+        prefix = options['prefix']
+
+        if options['doctors'] < 1 and (options['services'] or options['appointments']):
+            raise CommandError('--doctors must be positive when generating services or appointments')
+        if options['patients'] < 1 and options['appointments']:
+            raise CommandError('--patients must be positive when generating appointments')
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'users prefixed "{prefix}_" already exist; pick another --prefix')
+
+        _, doctor_group, patient_group = PermissionSeeder.seed_all()["groups"]
+        # hashing once keeps seeding fast; every generated user shares the password
+        password = make_password(options['password'])
+
+        doctor_ids = self.create_users(f'{prefix}_doctor', options['doctors'], password, doctor_group)
+        patient_ids = self.create_users(f'{prefix}_patient', options['patients'], password, patient_group)
+        services = self.create_services(options['services'], doctor_ids)
+        self.create_appointments(options['appointments'], services, patient_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(doctor_ids)} doctors, {len(patient_ids)} patients, '
+            f'{len(services)} services and {options["appointments"]} appointments'
+        ))
+
+    def insert(self, label, model, rows, total):
+        # batched bulk_create, one transaction per chunk; appointments are not
+        # kept in memory, everything else is returned with its primary key
+        created = []
+        chunk = []
+        inserted = 0
+        started = time.perf_counter()
+
+        def flush():
+            nonlocal inserted
+            with transaction.atomic():
+                objects = model.objects.bulk_create(chunk, batch_size=self.options['batch_size'])
+            inserted += len(objects)
+            if model is not Appointment:
+                created.extend(objects)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{label}: {inserted}/{total} ({inserted / elapsed:,.0f} rows/s)')
+
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.options['chunk_size']:
+                flush()
+                chunk = []
+        if chunk:
+            flush()
+
+        return created
+
+    def create_users(self, username_prefix, count, password, group):
+        users = self.insert(username_prefix, User, (
+            User(username=f'{username_prefix}_{i}', password=password)
+            for i in range(count)
+        ), count)
+
+        Membership = User.groups.through
+        self.insert(f'{username_prefix} groups', Membership, (
+            Membership(user_id=user.id, group_id=group.id) for user in users
+        ), count)
+
+        return [user.id for user in users]
+
+    def create_services(self, count, doctor_ids):
+        return self.insert('services', Service, (
+            Service(
+                name=f'{self.random.choice(SPECIALTIES)} #{i}',
+                address=f'{self.random.randint(1, 9999)} {self.random.choice(STREETS)}, {self.random.choice(CITIES)}',
+                doctor_id=self.random.choice(doctor_ids),
+            ) for i in range(count)
+        ), count)
+
+    def create_appointments(self, count, services, patient_ids):
+        if not count:
+            return
+        if not services:
+            raise CommandError('--services must be positive when generating appointments')
+
+        slot_length = self.options['slot_length']
+        start = self.options['start']
+        if start is None:
+            start = (int(time.time()) // 3600 + 1) * 3600
+
+        # popularity follows a Zipf-like curve so a few services take most bookings
+        weights = [1 / (rank + 1) for rank in range(len(services))]
+        self.random.shuffle(weights)
+        next_slot = [0] * len(services)
+
+        def appointments():
+            for picked in self.random.choices(range(len(services)), weights=weights, k=count):
+                service = services[picked]
+                # geometric gaps keep each service's slots unique and increasing
+                next_slot[picked] += 1 + int(self.random.expovariate(1.0))
+                yield Appointment(
+                    scheduled_at=start + next_slot[picked] * slot_length,
+                    service_id=service.id,
+                    doctor_id=service.doctor_id,
+                    patient_id=self.random.choice(patient_ids),
+                )
+
+        self.insert('appointments', Appointment, appointments(), count)
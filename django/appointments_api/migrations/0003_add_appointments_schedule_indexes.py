@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments_api", "0002_create_appointments_table"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["doctor", "scheduled_at"], name="appointment_doctor_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["patient", "scheduled_at"], name="appointment_patient_time_idx"),
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Cast, Round
+
+import appointments_api.fields
+
+
+def decimal_seconds_to_microseconds(apps, schema_editor):
+    Appointment = apps.get_model("appointments_api", "Appointment")
+    Appointment.objects.update(
+        scheduled_at_us=Cast(
+            Round(F("scheduled_at") * Value(1_000_000)), models.BigIntegerField()
+        )
+    )
+
+
+def microseconds_to_decimal_seconds(apps, schema_editor):
+    Appointment = apps.get_model("appointments_api", "Appointment")
+    Appointment.objects.update(
+        scheduled_at=F("scheduled_at_us") / Value(1_000_000.0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments_api", "0003_add_appointments_schedule_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="appointment",
+            name="appointment_doctor_time_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="appointment",
+            name="appointment_patient_time_idx",
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="scheduled_at_us",
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="appointment",
+            name="scheduled_at",
+            field=models.DecimalField(decimal_places=6, max_digits=20, null=True),
+        ),
+        migrations.RunPython(
+            decimal_seconds_to_microseconds, microseconds_to_decimal_seconds
+        ),
+        migrations.RemoveField(
+            model_name="appointment",
+            name="scheduled_at",
+        ),
+        migrations.RenameField(
+            model_name="appointment",
+            old_name="scheduled_at_us",
+            new_name="scheduled_at",
+        ),
+        migrations.AlterField(
+            model_name="appointment",
+            name="scheduled_at",
+            field=appointments_api.fields.EpochMicrosecondsField(),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["doctor", "scheduled_at"], name="appointment_doctor_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["patient", "scheduled_at"], name="appointment_patient_time_idx"
+            ),
+        ),
+    ]
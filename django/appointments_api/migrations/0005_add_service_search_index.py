@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# external-content FTS5 table: it stores only the index and reads name and
+# address back from appointments_api_service. Triggers rather than signals
+# keep it in sync, so bulk_create and queryset.update() are covered too.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE appointments_api_service_fts USING fts5(
+        name, address,
+        content='appointments_api_service', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER appointments_api_service_fts_insert AFTER INSERT ON appointments_api_service BEGIN
+        INSERT INTO appointments_api_service_fts(rowid, name, address) VALUES (new.id, new.name, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER appointments_api_service_fts_delete AFTER DELETE ON appointments_api_service BEGIN
+        INSERT INTO appointments_api_service_fts(appointments_api_service_fts, rowid, name, address)
+        VALUES ('delete', old.id, old.name, old.address);
+    END
+    """,
+    """
+    CREATE TRIGGER appointments_api_service_fts_update AFTER UPDATE OF name, address ON appointments_api_service BEGIN
+        INSERT INTO appointments_api_service_fts(appointments_api_service_fts, rowid, name, address)
+        VALUES ('delete', old.id, old.name, old.address);
+        INSERT INTO appointments_api_service_fts(rowid, name, address) VALUES (new.id, new.name, new.address);
+    END
+    """,
+    "INSERT INTO appointments_api_service_fts(appointments_api_service_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS appointments_api_service_fts_update",
+    "DROP TRIGGER IF EXISTS appointments_api_service_fts_delete",
+    "DROP TRIGGER IF EXISTS appointments_api_service_fts_insert",
+    "DROP TABLE IF EXISTS appointments_api_service_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        # other backends fall back to a plain filter in appointments_api.search
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments_api", "0004_store_scheduled_at_as_epoch_microseconds"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+from django.conf import settings
+from django.db import IntegrityError, migrations, models
+from django.db.models import Count
+
+
+def check_for_double_bookings(apps, schema_editor):
+    # existing double bookings are left for an operator to resolve, since
+    # picking which patient loses a slot is not the migration's call
+    Appointment = apps.get_model("appointments_api", "Appointment")
+    duplicates = (
+        Appointment.objects.values("service_id", "scheduled_at")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by("service_id", "scheduled_at")
+    )
+    groups = []
+    for duplicate in duplicates:
+        ids = Appointment.objects.filter(
+            service_id=duplicate["service_id"], scheduled_at=duplicate["scheduled_at"]
+        ).order_by("id").values_list("id", flat=True)
+        groups.append(
+            f"service {duplicate['service_id']} at {duplicate['scheduled_at']}: "
+            f"appointments {', '.join(map(str, ids))}"
+        )
+    if groups:
+        raise IntegrityError(
+            "Cannot add appointment_service_slot_unique while slots are double "
+            "booked; reschedule or delete all but one appointment in each group "
+            "and migrate again:\n  " + "\n  ".join(groups)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments_api", "0006_add_idempotency_keys"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_for_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.UniqueConstraint(
+                fields=("service", "scheduled_at"),
+                name="appointment_service_slot_unique",
+            ),
+        ),
+    ]
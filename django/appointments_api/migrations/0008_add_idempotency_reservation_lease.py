@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments_api", "0007_add_appointment_slot_constraint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="reserved_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
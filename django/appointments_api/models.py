@@ -1,15 +1,46 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .fields import EpochMicrosecondsField
 
 User = get_user_model()
 
+SLOT_CONSTRAINT = "appointment_service_slot_unique"
+
 class Service(models.Model):
     name = models.CharField(max_length=100, null=False)
     address = models.CharField(max_length=255, null=False)
     doctor = models.ForeignKey(User, on_delete=models.CASCADE)
 
 class Appointment(models.Model):
-    scheduled_at = models.DecimalField(max_digits=20, decimal_places=6, null=False)
+    scheduled_at = EpochMicrosecondsField(null=False)
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
     doctor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assignations")
     patient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="appointments")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["doctor", "scheduled_at"], name="appointment_doctor_time_idx"),
+            models.Index(fields=["patient", "scheduled_at"], name="appointment_patient_time_idx"),
+        ]
+        constraints = [
+            # one booking per service and slot, enforced by the database so
+            # concurrent requests need no check-then-insert
+            models.UniqueConstraint(fields=["service", "scheduled_at"], name=SLOT_CONSTRAINT),
+        ]
+
+class IdempotencyKey(models.Model):
+    # status_code stays null while the first request is still running;
+    # reserved_at lets a reservation orphaned by a dead process be reclaimed
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    body = models.BinaryField(null=True)
+    expires_at = models.DateTimeField(db_index=True)
+    reserved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="idempotency_user_key_unique"),
+        ]
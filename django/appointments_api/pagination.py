@@ -0,0 +1,61 @@
+import base64
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import Max
+
+def encode_cursor(position, kind="id"):
+    # a tuple is a composite keyset position, e.g. (scheduled_at, id)
+    if isinstance(position, tuple):
+        position = ":".join(str(part) for part in position)
+    return base64.urlsafe_b64encode(f"{kind}:{position}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, kind="id", size=1):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, *positions = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        if prefix != kind or len(positions) != size:
+            raise ValueError
+        positions = tuple(int(position) for position in positions)
+        return positions[0] if size == 1 else positions
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+
+def page_limit(request):
+    page_size = getattr(settings, "SERVICES_PAGE_SIZE", 100)
+    max_page_size = getattr(settings, "SERVICES_MAX_PAGE_SIZE", 500)
+    limit = int(request.GET.get("limit", page_size))
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, max_page_size)
+
+def estimated_count(model):
+    # planner statistics rather than COUNT(*), cached so a page never pays a scan
+    key = f"appointments_api:estimated_count:{model._meta.db_table}"
+    estimate = cache.get(key)
+    if estimate is None:
+        estimate = table_statistics_count(model)
+        cache.set(key, estimate, getattr(settings, "ESTIMATED_COUNT_TTL", 300))
+    return estimate
+
+def table_statistics_count(model):
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return row[0]
+        elif connection.vendor == "sqlite":
+            # populated by ANALYZE; the first figure of a stat row is the table's row count
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+
+    # highest id is an index lookup; it overcounts by the number of deleted rows
+    return model._default_manager.aggregate(max_id=Max("pk"))["max_id"] or 0
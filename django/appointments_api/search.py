@@ -0,0 +1,72 @@
+import re
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from .models import Service
+
+FTS_TABLE = "appointments_api_service_fts"
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+class ServiceSearch:
+    @staticmethod
+    def connection():
+        return connections[router.db_for_read(Service)]
+
+    @staticmethod
+    def available():
+        return ServiceSearch.connection().vendor == "sqlite"
+
+    @staticmethod
+    def terms(query):
+        terms = TERM_PATTERN.findall(query or "")
+        max_terms = getattr(settings, "SERVICES_SEARCH_MAX_TERMS", 8)
+        if not terms:
+            raise ValueError("q must contain at least one word")
+        if len(terms) > max_terms:
+            raise ValueError(f"q may contain at most {max_terms} words")
+        return terms
+
+    @staticmethod
+    def match_expression(terms):
+        # every term is quoted, so user input never reaches FTS5 query syntax,
+        # and starred, so "card bos" matches "Cardiology, Boston"
+        return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+    @staticmethod
+    def search_ids(query, limit, offset=0):
+        terms = ServiceSearch.terms(query)
+        if not ServiceSearch.available():
+            condition = Q()
+            for term in terms:
+                condition &= Q(name__icontains=term) | Q(address__icontains=term)
+            return list(
+                    Service.objects.filter(condition).order_by("id")
+                    .values_list("id", flat=True)[offset:offset + limit]
+            )
+
+        name_weight, address_weight = getattr(settings, "SERVICES_SEARCH_WEIGHTS", (10.0, 1.0))
+        with ServiceSearch.connection().cursor() as cursor:
+            cursor.execute(
+                    f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                    f"ORDER BY bm25({FTS_TABLE}, %s, %s), rowid LIMIT %s OFFSET %s",
+                    [ServiceSearch.match_expression(terms), name_weight, address_weight, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def search(query, limit, offset=0):
+        ids = ServiceSearch.search_ids(query, limit, offset)
+        services = Service.objects.select_related("doctor").in_bulk(ids)
+        # rows deleted between the two queries are skipped
+        return [services[service_id] for service_id in ids if service_id in services]
+
+    @staticmethod
+    def rebuild(optimize=True):
+        if not ServiceSearch.available():
+            return False
+
+        with ServiceSearch.connection().cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            if optimize:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        return True
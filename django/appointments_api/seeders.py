@@ -37,7 +37,7 @@ class PermissionSeeder:
         appointment_permissions = PermissionSeeder.create_crud_permissions(appointment_ct)
 
         admin_group.permissions.set([*service_permissions.values()])
-        doctor_group.permissions.set([*service_permissions.values()])
+        doctor_group.permissions.set([*service_permissions.values(), appointment_permissions["view_appointment"]])
         patient_group.permissions.set([service_permissions["view_service"], *appointment_permissions.values()])
 
         return {
@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from health_linkr.tasks import run_after_commit
+from .audit import appointment_row, record_appointment_events
+from .availability import AvailabilityIndex
+from .cache import ServiceCatalogCache
+from .models import Appointment, Service
+
+User = get_user_model()
+
+@receiver(post_save, sender=Appointment)
+def index_saved_appointment(sender, instance, created, **kwargs):
+    if created:
+        doctor_id, scheduled_at = instance.doctor_id, instance.scheduled_at
+        transaction.on_commit(lambda: AvailabilityIndex.appointment_added(doctor_id, scheduled_at))
+        run_after_commit(record_appointment_events, "booked", [appointment_row(instance)])
+    else:
+        # the previous slot is unknown here, so let schedules reload
+        transaction.on_commit(AvailabilityIndex.clear)
+
+@receiver(post_delete, sender=Appointment)
+def unindex_deleted_appointment(sender, instance, **kwargs):
+    doctor_id, scheduled_at = instance.doctor_id, instance.scheduled_at
+    transaction.on_commit(lambda: AvailabilityIndex.appointment_removed(doctor_id, scheduled_at))
+    run_after_commit(record_appointment_events, "cancelled", [appointment_row(instance)])
+
+@receiver([post_save, post_delete], sender=Service)
+def invalidate_cached_service(sender, instance, **kwargs):
+    ServiceCatalogCache.invalidate_services([instance.pk])
+
+@receiver(post_save, sender=User)
+def invalidate_cached_doctor_services(sender, instance, created, **kwargs):
+    # services embed the doctor's username
+    if created:
+        return
+
+    service_ids = list(Service.objects.filter(doctor_id=instance.pk).values_list("id", flat=True))
+    if service_ids:
+        ServiceCatalogCache.invalidate_services(service_ids)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from .fields import epoch_microseconds
+from .models import Appointment, SLOT_CONSTRAINT
+
+def parse_scheduled_at(value):
+    # with APPOINTMENT_SLOT_GRANULARITY set, bookings must start on a slot
+    # boundary, so the (service, scheduled_at) constraint is per slot
+    try:
+        scheduled_at = float(value)
+        microseconds = epoch_microseconds(scheduled_at)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("scheduled_at must be a finite number of epoch seconds within the 64-bit range")
+    granularity = getattr(settings, "APPOINTMENT_SLOT_GRANULARITY", None)
+    if granularity and microseconds % round(granularity * 1_000_000):
+        raise ValueError(f"scheduled_at must fall on a {granularity}-second slot boundary")
+    return scheduled_at
+
+def is_slot_conflict(error):
+    # PostgreSQL and MySQL name the violated constraint, SQLite its columns
+    message = str(error)
+    table = Appointment._meta.db_table
+    return SLOT_CONSTRAINT in message or (
+        f"{table}.service_id" in message and f"{table}.scheduled_at" in message
+    )
+
+def book_slot(**fields):
+    # the unique constraint decides who gets the slot; the savepoint keeps an
+    # enclosing transaction usable for the loser
+    with transaction.atomic():
+        return Appointment.objects.create(**fields)
+
+def slot_conflict(service_id, scheduled_at):
+    return {
+        "error": "Slot Unavailable",
+        "message": f"Service {service_id} is already booked at {scheduled_at}",
+        "status": "conflict"
+    }
+
+def slot_conflict_response(service_id, scheduled_at):
+    return JsonResponse(slot_conflict(service_id, scheduled_at), status=409)
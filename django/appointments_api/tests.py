@@ -1,15 +1,31 @@
 import json
-from datetime import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
 
-from django.test import TestCase, Client, override_settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, Client, AsyncClient, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import ContentType, Permission, Group
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
 
+from health_linkr.tasks import background_tasks
 from jwt_authentication.utils import JWTUtils
+from .availability import AvailabilityIndex, DoctorSchedule
+from .cache import ServiceCatalogCache
+from .pagination import estimated_count
 from .seeders import PermissionSeeder
-from .models import Service, Appointment
+from .models import Service, Appointment, IdempotencyKey
 
 User = get_user_model()
 
@@ -111,6 +127,106 @@ class ServicesApiTests(TestCase):
         ])
         self.assertEqual(response.json()["status"], "success")
 
+    def test_index_service_stream_success(self):
+        doctor_group = ServicesApiTests.doctor_group
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(doctor_group)
+        patient_group = ServicesApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+        services = [
+            Service.objects.create(name=f"service{i}", address="New Jersey", doctor=doctor)
+            for i in range(5)
+        ]
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        with override_settings(SERVICES_STREAM_CHUNK_SIZE=2):
+            response = self.client.get(
+                    reverse("show_all_services"), {"stream": "true"},
+                    content_type="application/json", headers=headers
+            )
+            self.assertTrue(response.streaming)
+            body = b"".join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(body)["services"], [
+            {
+                "id": service.id, "name": service.name, "address": service.address,
+                "doctor": {"id": doctor.id, "username": doctor.username}
+            } for service in services
+        ])
+        self.assertEqual(json.loads(body)["status"], "success")
+
+    def test_index_service_stream_empty(self):
+        patient_group = ServicesApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        response = self.client.get(
+                reverse("show_all_services"), {"stream": "1"},
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), {"services": [], "status": "success"})
+
+    def test_index_service_keyset_pagination(self):
+        doctor_group = ServicesApiTests.doctor_group
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(doctor_group)
+        patient_group = ServicesApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+        services = [
+            Service.objects.create(name=f"service{i}", address="New Jersey", doctor=doctor)
+            for i in range(5)
+        ]
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        pages = []
+        params = {"limit": 2}
+        while True:
+            response = self.client.get(reverse("show_all_services"), params, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            pages.append([service["id"] for service in response.json()["services"]])
+            if response.json()["next"] is None:
+                break
+            params = {"limit": 2, "cursor": response.json()["next"]}
+
+        self.assertEqual(pages, [
+            [services[0].id, services[1].id], [services[2].id, services[3].id], [services[4].id]
+        ])
+
+    def test_index_service_invalid_cursor(self):
+        patient_group = ServicesApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        response = self.client.get(reverse("show_all_services"), {"cursor": "%%%"}, headers=headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "bad-request")
+
+    def test_index_service_estimated_total(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient_group = ServicesApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+        for i in range(4):
+            Service.objects.create(name=f"service{i}", address="New Jersey", doctor=doctor)
+        cache.clear()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        response = self.client.get(reverse("show_all_services"), {"include_total": "true"}, headers=headers)
+
+        self.assertEqual(response.json()["estimated_total"], 4)
+        with self.assertNumQueries(0):
+            estimated_count(Service)
+
     def test_show_service_success(self):
         doctor_group = ServicesApiTests.doctor_group
         doctor = User.objects.create_user(username='doctor1')
@@ -135,6 +251,49 @@ class ServicesApiTests(TestCase):
         })
         self.assertEqual(response.json()["status"], "success")
 
+    # query budgets assume permission claims, which need a shared version cache
+    @override_settings(JWT_PERMISSION_VERSION_CACHE_SHARED=True)
+    def test_show_services_batch(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(ServicesApiTests.patient_group)
+        services = [
+            Service.objects.create(name=f"service{i}", address="New Jersey", doctor=doctor)
+            for i in range(3)
+        ]
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        ids = f"{services[2].id},{services[0].id},123123,{services[2].id}"
+        # user + groups, then one joined query for the whole batch
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("show_all_services"), {"ids": ids}, headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()["services"]), [str(services[2].id), str(services[0].id), "123123"])
+        self.assertEqual(response.json()["services"][str(services[0].id)], {
+            "id": services[0].id, "name": "service0", "address": "New Jersey",
+            "doctor": {"id": doctor.id, "username": doctor.username}
+        })
+        self.assertEqual(response.json()["services"]["123123"]["status"], "not-found")
+        self.assertEqual((response.json()["found"], response.json()["missing"]), (2, 1))
+
+        response = self.client.get(reverse("async_show_all_services"), {"ids": ids}, headers=headers)
+        self.assertEqual(response.json()["services"]["123123"]["status"], "not-found")
+        self.assertEqual(response.json()["found"], 2)
+
+    def test_show_services_batch_invalid(self):
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(ServicesApiTests.patient_group)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        with override_settings(SERVICES_BATCH_MAX_IDS=2):
+            statuses = [
+                self.client.get(reverse("show_all_services"), {"ids": ids}, headers=headers).status_code
+                for ids in ("1,2,3", "", "1,abc", "99999999999999999999999")
+            ]
+
+        self.assertEqual(statuses, [400, 400, 400, 400])
+
     def test_show_service_not_found(self):
         patient_group = ServicesApiTests.patient_group
         patient = User.objects.create_user(username='patient1')
@@ -236,6 +395,94 @@ class AppointmentsApiTests(TestCase):
         self.assertIsNotNone(appointment)
         self.assertAlmostEqual(float(appointment.scheduled_at), scheduled_at, places=1)
 
+    def test_create_appointment_records_audit_event_after_commit(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AppointmentsApiTests.patient_group)
+        service = Service.objects.create(name="service1", address="New Jersey", doctor=doctor)
+
+        data = {"scheduled_at": 1_800_000_000.0, "service_id": service.id}
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        with self.assertLogs("appointments_api.audit", level="INFO") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                        reverse("create_appointment"), json.dumps(data),
+                        content_type="application/json", headers=headers
+                )
+            background_tasks.drain(5)
+
+        appointment_id = response.json()["appointment"]["id"]
+        self.assertIn(f"appointment {appointment_id} booked", logs.output[0])
+
+    def test_create_appointment_slot_taken(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AppointmentsApiTests.patient_group)
+        service = Service.objects.create(name="service1", address="New Jersey", doctor=doctor)
+        other_service = Service.objects.create(name="service2", address="New Jersey", doctor=doctor)
+        Appointment.objects.create(scheduled_at=1_800_000_000.0, service=service, doctor=doctor, patient=doctor)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        taken = self.client.post(
+                reverse("create_appointment"), json.dumps({"scheduled_at": 1_800_000_000.0, "service_id": service.id}),
+                content_type="application/json", headers=headers
+        )
+        other = self.client.post(
+                reverse("create_appointment"),
+                json.dumps({"scheduled_at": 1_800_000_000.0, "service_id": other_service.id}),
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(taken.status_code, 409)
+        self.assertEqual(taken.json()["error"], "Slot Unavailable")
+        self.assertEqual(taken.json()["status"], "conflict")
+        self.assertEqual(other.status_code, 201)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+    def test_create_appointment_off_slot_boundary(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AppointmentsApiTests.patient_group)
+        service = Service.objects.create(name="service1", address="New Jersey", doctor=doctor)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        with override_settings(APPOINTMENT_SLOT_GRANULARITY=900):
+            statuses = [
+                self.client.post(
+                        reverse("create_appointment"),
+                        json.dumps({"scheduled_at": scheduled_at, "service_id": service.id}),
+                        content_type="application/json", headers=headers
+                ).status_code
+                for scheduled_at in (1_800_000_100.0, 1_800_000_900.0)
+            ]
+
+        self.assertEqual(statuses, [400, 201])
+
+    def test_create_appointment_rejects_unrepresentable_times(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AppointmentsApiTests.patient_group)
+        service = Service.objects.create(name="service1", address="New Jersey", doctor=doctor)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        values = ("inf", "nan", 1e30, None)
+        statuses = [
+            self.client.post(
+                    reverse("create_appointment"), json.dumps({"scheduled_at": value, "service_id": service.id}),
+                    content_type="application/json", headers=headers
+            ).status_code
+            for value in values
+        ]
+        bulk = self.client.post(
+                reverse("bulk_create_appointments"),
+                json.dumps({"appointments": [{"scheduled_at": value, "service_id": service.id} for value in values]}),
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(statuses, [400] * len(values))
+        self.assertEqual([item["status"] for item in bulk.json()["appointments"]], ["bad-request"] * len(values))
+        self.assertFalse(Appointment.objects.exists())
+
     def test_index_appointment_success(self):
         doctor_group = AppointmentsApiTests.doctor_group
         doctor = User.objects.create_user(username='doctor1')
@@ -289,3 +536,805 @@ class AppointmentsApiTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()["status"], "deleted")
         self.assertFalse(Appointment.objects.filter(id=appointment.id).exists())
+
+    # query budgets assume permission claims, which need a shared version cache
+    @override_settings(JWT_PERMISSION_VERSION_CACHE_SHARED=True)
+    def test_bulk_create_appointments_success(self):
+        doctor_group = AppointmentsApiTests.doctor_group
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(doctor_group)
+        patient_group = AppointmentsApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+        services = [
+            Service.objects.create(name=f"service{i}", address="New Jersey", doctor=doctor)
+            for i in range(3)
+        ]
+
+        scheduled_at = datetime.now().timestamp()
+        data = {"appointments": [
+            {"scheduled_at": scheduled_at + i, "service_id": services[i % 3].id} for i in range(30)
+        ]}
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        # user + groups, services, savepoint, insert, release
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                    reverse("bulk_create_appointments"), json.dumps(data),
+                    content_type="application/json", headers=headers
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 30)
+        self.assertEqual(response.json()["appointments"][4]["appointment"]["service"], {
+            "id": services[1].id, "name": "service1", "address": "New Jersey"
+        })
+        self.assertEqual(Appointment.objects.filter(patient=patient).count(), 30)
+
+    def test_bulk_create_appointments_partial(self):
+        doctor_group = AppointmentsApiTests.doctor_group
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(doctor_group)
+        patient_group = AppointmentsApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+        service = Service.objects.create(
+                name="service1", address="New Jersey", doctor=doctor
+        )
+
+        data = {"appointments": [
+            {"scheduled_at": datetime.now().timestamp(), "service_id": service.id},
+            {"scheduled_at": datetime.now().timestamp(), "service_id": 123123},
+            {"scheduled_at": "tomorrow", "service_id": service.id},
+        ]}
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        response = self.client.post(
+                reverse("bulk_create_appointments"), json.dumps(data),
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+                [item["status"] for item in response.json()["appointments"]],
+                ["created", "not-found", "bad-request"]
+        )
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_bulk_create_appointments_validates_service_ids(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AppointmentsApiTests.patient_group)
+        service = Service.objects.create(name="service1", address="New Jersey", doctor=doctor)
+
+        data = {"appointments": [
+            {"scheduled_at": 1_800_000_000.0, "service_id": [service.id]},
+            {"scheduled_at": 1_800_001_800.0, "service_id": str(service.id)},
+            {"scheduled_at": 1_800_003_600.0, "service_id": 10 ** 30},
+            {"scheduled_at": 1_800_005_400.0, "service_id": True},
+            "not an object",
+        ]}
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        response = self.client.post(
+                reverse("bulk_create_appointments"), json.dumps(data),
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+                [item["status"] for item in response.json()["appointments"]],
+                ["bad-request", "created", "bad-request", "bad-request", "bad-request"]
+        )
+        self.assertEqual(Appointment.objects.get().service, service)
+
+    def test_bulk_create_appointments_reports_taken_slots(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AppointmentsApiTests.patient_group)
+        service = Service.objects.create(name="service1", address="New Jersey", doctor=doctor)
+        Appointment.objects.create(scheduled_at=1_800_000_000.0, service=service, doctor=doctor, patient=doctor)
+
+        data = {"appointments": [
+            {"scheduled_at": 1_800_000_000.0, "service_id": service.id},
+            {"scheduled_at": 1_800_001_800.0, "service_id": service.id},
+            {"scheduled_at": 1_800_001_800.0, "service_id": service.id},
+        ]}
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        response = self.client.post(
+                reverse("bulk_create_appointments"), json.dumps(data),
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+                [item["status"] for item in response.json()["appointments"]],
+                ["conflict", "created", "conflict"]
+        )
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(Appointment.objects.filter(patient=patient).count(), 1)
+
+    def test_bulk_create_appointments_too_many(self):
+        patient_group = AppointmentsApiTests.patient_group
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+
+        data = {"appointments": [{"scheduled_at": 1, "service_id": 1}] * 3}
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        with override_settings(APPOINTMENTS_BULK_CREATE_MAX_ITEMS=2):
+            response = self.client.post(
+                    reverse("bulk_create_appointments"), json.dumps(data),
+                    content_type="application/json", headers=headers
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "bad-request")
+
+    def test_doctor_agenda_success(self):
+        doctor_group = AppointmentsApiTests.doctor_group
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(doctor_group)
+        other_doctor = User.objects.create_user(username='doctor2')
+        patient = User.objects.create_user(username='patient1')
+        service = Service.objects.create(
+                name="service1", address="New Jersey", doctor=doctor
+        )
+        other_service = Service.objects.create(
+                name="service2", address="New Jersey", doctor=other_doctor
+        )
+        for scheduled_at in [1300, 1000, 1200, 900, 1100, 2000]:
+            Appointment.objects.create(scheduled_at=scheduled_at, service=service, doctor=doctor, patient=patient)
+        Appointment.objects.create(scheduled_at=1000, service=other_service, doctor=other_doctor, patient=patient)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(doctor)}" }
+        response = self.client.get(
+                reverse("show_doctor_agenda"), {"start": 1000, "end": 2000, "limit": 3},
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a["scheduled_at"] for a in response.json()["appointments"]], [1000, 1100, 1200])
+        self.assertEqual(response.json()["appointments"][0]["patient"], {"id": patient.id, "username": "patient1"})
+        self.assertIsNotNone(response.json()["next"])
+
+        response = self.client.get(
+                reverse("show_doctor_agenda"),
+                {"start": 1000, "end": 2000, "limit": 3, "cursor": response.json()["next"]},
+                content_type="application/json", headers=headers
+        )
+        self.assertEqual([a["scheduled_at"] for a in response.json()["appointments"]], [1300])
+        self.assertIsNone(response.json()["next"])
+
+    def test_doctor_agenda_pages_through_shared_start_times(self):
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(AppointmentsApiTests.doctor_group)
+        patient = User.objects.create_user(username='patient1')
+        services = [Service.objects.create(name=f"service{i}", address="New Jersey", doctor=doctor) for i in range(3)]
+        appointments = [
+            Appointment.objects.create(scheduled_at=1000, service=service, doctor=doctor, patient=patient)
+            for service in services
+        ]
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(doctor)}" }
+        seen = []
+        params = {"start": 0, "end": 2000, "limit": 1}
+        for _ in range(len(appointments) + 1):
+            response = self.client.get(reverse("show_doctor_agenda"), params, headers=headers)
+            seen += [a["id"] for a in response.json()["appointments"]]
+            if response.json()["next"] is None:
+                break
+            params["cursor"] = response.json()["next"]
+
+        self.assertEqual(seen, [appointment.id for appointment in appointments])
+        self.assertIsNone(response.json()["next"])
+
+    def test_doctor_agenda_invalid_window(self):
+        doctor_group = AppointmentsApiTests.doctor_group
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(doctor_group)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(doctor)}" }
+        response = self.client.get(
+                reverse("show_doctor_agenda"), {"start": 2000, "end": 1000},
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "bad-request")
+
+    def test_doctor_agenda_uses_index(self):
+        doctor = User.objects.create_user(username='doctor1')
+        plan = (
+            Appointment.objects
+            .filter(doctor=doctor, scheduled_at__gte=1000, scheduled_at__lt=2000)
+            .order_by("scheduled_at", "id")
+            .explain()
+        )
+
+        self.assertIn("appointment_doctor_time_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_scheduled_at_stored_as_integer_microseconds(self):
+        doctor = User.objects.create_user(username='doctor1')
+        service = Service.objects.create(
+                name="service1", address="New Jersey", doctor=doctor
+        )
+        appointment = Appointment.objects.create(
+                scheduled_at=1760000000.123456, service=service, doctor=doctor, patient=doctor
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                    "SELECT scheduled_at, typeof(scheduled_at) FROM appointments_api_appointment WHERE id = %s",
+                    [appointment.id]
+            )
+            self.assertEqual(cursor.fetchone(), (1760000000123456, "integer"))
+
+        self.assertEqual(Appointment.objects.get(id=appointment.id).scheduled_at, 1760000000.123456)
+        self.assertTrue(Appointment.objects.filter(scheduled_at__gt=1760000000.123455).exists())
+        self.assertFalse(Appointment.objects.filter(scheduled_at__gt=1760000000.123456).exists())
+
+class AsyncViewsApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed_data = PermissionSeeder.seed_all()
+        cls.admin_group, cls.doctor_group, cls.patient_group = cls.seed_data["groups"]
+
+    def setUp(self):
+        self.client = AsyncClient()
+        self.doctor = User.objects.create_user(username='doctor1')
+        self.doctor.groups.add(AsyncViewsApiTests.doctor_group)
+        self.patient = User.objects.create_user(username='patient1')
+        self.patient.groups.add(AsyncViewsApiTests.patient_group)
+        self.service = Service.objects.create(
+                name="service1", address="New Jersey", doctor=self.doctor
+        )
+        self.patient_headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(self.patient)}" }
+
+    async def test_index_service_success(self):
+        headers = self.patient_headers
+        response = await self.client.get(reverse("async_show_all_services"), headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["services"], [{
+            "id": self.service.id, "name": "service1", "address": "New Jersey",
+            "doctor": {"id": self.doctor.id, "username": self.doctor.username}
+        }])
+
+    async def test_create_service_unauthorized(self):
+        data = {"name": "Service 2", "address": "New Jersey", "doctor_id": self.doctor.id}
+        headers = self.patient_headers
+        response = await self.client.post(
+                reverse("async_create_service"), json.dumps(data),
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["status"], "forbidden")
+
+    async def test_show_service_requires_token(self):
+        response = await self.client.get(reverse("async_show_service", kwargs={"service_id": self.service.id}))
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_create_and_delete_appointment_success(self):
+        scheduled_at = datetime.now().timestamp()
+        data = {"scheduled_at": scheduled_at, "service_id": self.service.id}
+        headers = self.patient_headers
+        response = await self.client.post(
+                reverse("async_create_appointment"), json.dumps(data),
+                content_type="application/json", headers=headers
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["appointment"]["doctor"], {"id": self.doctor.id, "username": "doctor1"})
+        appointment_id = response.json()["appointment"]["id"]
+
+        response = await self.client.get(reverse("async_show_all_appointments"), headers=headers)
+        self.assertEqual([a["id"] for a in response.json()["appointments"]], [appointment_id])
+
+        response = await self.client.delete(
+                reverse("async_delete_appointment", kwargs={"appointment_id": appointment_id}),
+                headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await Appointment.objects.filter(id=appointment_id).aexists())
+
+    async def test_create_appointment_slot_taken(self):
+        data = {"scheduled_at": 1_800_000_000.0, "service_id": self.service.id}
+        statuses = [
+            (await self.client.post(
+                    reverse("async_create_appointment"), json.dumps(data),
+                    content_type="application/json", headers=self.patient_headers
+            )).status_code
+            for _ in range(2)
+        ]
+
+        self.assertEqual(statuses, [201, 409])
+        self.assertEqual(await Appointment.objects.acount(), 1)
+
+class AvailabilityApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed_data = PermissionSeeder.seed_all()
+        cls.admin_group, cls.doctor_group, cls.patient_group = cls.seed_data["groups"]
+
+    def setUp(self):
+        AvailabilityIndex.clear()
+        self.client = Client()
+        # a day ahead, on the hour, so slots never fall before "now"
+        self.base = (int(time.time()) // 3600 + 24) * 3600
+
+    def test_free_slots_skip_busy_intervals(self):
+        schedule = DoctorSchedule([self.base, self.base + 1800])
+
+        slots = schedule.free_slots(self.base, self.base + 7200, 1800, 1800, 10)
+
+        self.assertEqual(slots, [self.base + 3600, self.base + 5400])
+
+    def test_free_slots_respect_appointment_duration(self):
+        schedule = DoctorSchedule([self.base + 600])
+
+        slots = schedule.free_slots(self.base, self.base + 3600, 900, 1800, 10)
+
+        self.assertEqual(slots, [self.base + 2700])
+
+    def test_search_merges_doctors_and_tracks_new_appointments(self):
+        doctor1 = User.objects.create_user(username='doctor1')
+        doctor2 = User.objects.create_user(username='doctor2')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AvailabilityApiTests.patient_group)
+        service1 = Service.objects.create(name="service1", address="New Jersey", doctor=doctor1)
+        service2 = Service.objects.create(name="service2", address="New Jersey", doctor=doctor2)
+        Appointment.objects.create(scheduled_at=self.base, service=service1, doctor=doctor1, patient=patient)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        params = {
+            "service_ids": f"{service1.id},{service2.id}", "start": self.base,
+            "end": self.base + 7200, "slot_length": 1800, "limit": 3
+        }
+        response = self.client.get(reverse("show_availability"), params, headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+                [(slot["start"], slot["doctor"]["id"]) for slot in response.json()["slots"]],
+                [(self.base, doctor2.id), (self.base + 1800, doctor1.id), (self.base + 1800, doctor2.id)]
+        )
+        self.assertEqual(response.json()["slots"][0]["service_ids"], [service2.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(scheduled_at=self.base, service=service2, doctor=doctor2, patient=patient)
+
+        with self.assertNumQueries(0):
+            slots = AvailabilityIndex.earliest_free_slots([doctor1.id, doctor2.id], self.base, self.base + 7200, 1800, 1)
+        self.assertEqual(slots, [(self.base + 1800, doctor1.id)])
+
+    def test_index_only_holds_known_doctors_and_is_bounded(self):
+        doctor = User.objects.create_user(username='doctor1')
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AvailabilityApiTests.patient_group)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        made_up = ",".join(str(doctor.id + offset) for offset in range(1000, 1040))
+        response = self.client.get(
+                reverse("show_availability"), {"doctor_ids": f"{doctor.id},{made_up}"}, headers=headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({slot["doctor"]["id"] for slot in response.json()["slots"]}, {doctor.id})
+        self.assertEqual(AvailabilityIndex._schedules.stats()["size"], 1)
+
+        for doctor_id in range(AvailabilityIndex._schedules.max_size + 5):
+            AvailabilityIndex.schedule_for(doctor_id)
+        self.assertEqual(AvailabilityIndex._schedules.stats()["size"], AvailabilityIndex._schedules.max_size)
+
+    def test_search_rejects_non_finite_windows(self):
+        doctor = User.objects.create_user(username='doctor1')
+        doctor.groups.add(AvailabilityApiTests.doctor_group)
+        service = Service.objects.create(name="service1", address="New Jersey", doctor=doctor)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(doctor)}" }
+        invalid = [{"start": "nan"}, {"end": "inf"}, {"slot_length": "nan"}, {"slot_length": "1e-300"}, {"start": "1e300"}]
+        statuses = [
+            self.client.get(
+                    reverse("show_availability"), {"service_ids": service.id, **params}, headers=headers
+            ).status_code
+            for params in invalid
+        ]
+        agenda_statuses = [
+            self.client.get(reverse("show_doctor_agenda"), params, headers=headers).status_code
+            for params in ({"start": "nan"}, {"start": 0, "end": "nan"}, {"start": "1e300"})
+        ]
+
+        self.assertEqual(statuses, [400] * len(invalid))
+        self.assertEqual(agenda_statuses, [400] * 3)
+
+    def test_search_requires_targets(self):
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(AvailabilityApiTests.patient_group)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        response = self.client.get(reverse("show_availability"), headers=headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "bad-request")
+
+class ServiceCatalogCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed_data = PermissionSeeder.seed_all()
+        cls.admin_group, cls.doctor_group, cls.patient_group = cls.seed_data["groups"]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.doctor = User.objects.create_user(username='doctor1')
+        self.doctor.groups.add(ServiceCatalogCacheTests.doctor_group)
+        self.patient = User.objects.create_user(username='patient1')
+        self.patient.groups.add(ServiceCatalogCacheTests.patient_group)
+        self.service = Service.objects.create(
+                name="service1", address="New Jersey", doctor=self.doctor
+        )
+        self.patient_headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(self.patient)}" }
+        self.doctor_headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(self.doctor)}" }
+
+    def get_service(self):
+        return self.client.get(
+                reverse("show_service", kwargs={"service_id": self.service.id}), headers=self.patient_headers
+        )
+
+    # query budgets assume permission claims, which need a shared version cache
+    @override_settings(JWT_PERMISSION_VERSION_CACHE_SHARED=True)
+    def test_repeated_reads_are_served_from_cache(self):
+        self.patient_headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(self.patient)}" }
+        self.client.get(reverse("show_all_services"), headers=self.patient_headers)
+        self.get_service()
+        hits = ServiceCatalogCache.stats()["hits"]
+
+        with self.assertNumQueries(0):
+            list_response = self.client.get(reverse("show_all_services"), headers=self.patient_headers)
+            detail_response = self.get_service()
+
+        self.assertEqual(list_response.json()["services"][0]["name"], "service1")
+        self.assertEqual(detail_response.json()["service"]["name"], "service1")
+        self.assertEqual(ServiceCatalogCache.stats()["hits"], hits + 2)
+
+    def test_endpoints_with_same_query_do_not_share_entries(self):
+        Service.objects.create(name="Dermatology", address="Boston", doctor=self.doctor)
+
+        listing = self.client.get(reverse("show_all_services"), {"q": "derm"}, headers=self.patient_headers)
+        search = self.client.get(reverse("search_services"), {"q": "derm"}, headers=self.patient_headers)
+
+        self.assertEqual(len(listing.json()["services"]), 2)
+        self.assertEqual([service["name"] for service in search.json()["services"]], ["Dermatology"])
+
+    def test_update_service_invalidates_cache(self):
+        self.client.get(reverse("show_all_services"), headers=self.patient_headers)
+        self.get_service()
+
+        self.client.put(
+                reverse("update_service", kwargs={"service_id": self.service.id}),
+                json.dumps({"name": "Updated"}), content_type="application/json", headers=self.doctor_headers
+        )
+
+        list_response = self.client.get(reverse("show_all_services"), headers=self.patient_headers)
+        self.assertEqual(list_response.json()["services"][0]["name"], "Updated")
+        self.assertEqual(self.get_service().json()["service"]["name"], "Updated")
+
+    def test_create_and_delete_service_invalidate_list(self):
+        self.client.get(reverse("show_all_services"), headers=self.patient_headers)
+
+        Service.objects.create(name="service2", address="New Jersey", doctor=self.doctor)
+        response = self.client.get(reverse("show_all_services"), headers=self.patient_headers)
+        self.assertEqual(len(response.json()["services"]), 2)
+
+        self.service.delete()
+        response = self.client.get(reverse("show_all_services"), headers=self.patient_headers)
+        self.assertEqual(len(response.json()["services"]), 1)
+
+    def test_doctor_username_change_invalidates_cache(self):
+        self.get_service()
+
+        self.doctor.username = 'doctor1_renamed'
+        self.doctor.save()
+
+        self.assertEqual(self.get_service().json()["service"]["doctor"]["username"], 'doctor1_renamed')
+
+class SeedLoadDataCommandTests(TestCase):
+    def seed(self, prefix):
+        call_command(
+                "seed_load_data", patients=20, doctors=3, services=5, appointments=200,
+                prefix=prefix, start=1_800_000_000, chunk_size=64, batch_size=16, stdout=StringIO()
+        )
+        return list(
+                Appointment.objects.filter(patient__username__startswith=f"{prefix}_")
+                .order_by("id").values_list("scheduled_at", "service__name", "patient__username")
+        )
+
+    def test_seed_load_data_is_deterministic(self):
+        first = self.seed("run1")
+        second = self.seed("run2")
+
+        self.assertEqual(len(first), 200)
+        self.assertEqual(
+                [(at, name, username.replace("run1", "run2")) for at, name, username in first],
+                second
+        )
+        self.assertEqual(User.objects.filter(username__startswith="run1_doctor", groups__name="Doctor").count(), 3)
+        self.assertEqual(len({(at, name) for at, name, _ in first}), 200)
+
+class ServiceSearchApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed_data = PermissionSeeder.seed_all()
+        cls.admin_group, cls.doctor_group, cls.patient_group = cls.seed_data["groups"]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.doctor = User.objects.create_user(username='doctor1')
+        self.doctor.groups.add(ServiceSearchApiTests.doctor_group)
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(ServiceSearchApiTests.patient_group)
+        self.headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+
+    def search(self, params):
+        response = self.client.get(reverse("search_services"), params, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return [service["name"] for service in response.json()["services"]], response.json()["next"]
+
+    def test_prefix_search_ranks_name_matches_first(self):
+        Service.objects.create(name="Dental Cleaning", address="1 Cardiff Rd, Boston", doctor=self.doctor)
+        Service.objects.create(name="Cardiology", address="2 Main St, Boston", doctor=self.doctor)
+        Service.objects.create(name="Cardiology", address="3 Oak Ave, Denver", doctor=self.doctor)
+
+        names, _ = self.search({"q": "card bost"})
+
+        self.assertEqual(names, ["Cardiology", "Dental Cleaning"])
+
+    def test_index_follows_updates_and_deletes(self):
+        service = Service.objects.create(name="Eye Exam", address="Main St", doctor=self.doctor)
+        Service.objects.filter(id=service.id).update(name="Nutrition")
+
+        self.assertEqual(self.search({"q": "eye"})[0], [])
+        self.assertEqual(self.search({"q": "nutri"})[0], ["Nutrition"])
+
+        service.delete()
+        self.assertEqual(self.search({"q": "nutri"})[0], [])
+
+    def test_search_pagination(self):
+        Service.objects.bulk_create([
+            Service(name=f"Vaccination {i}", address="Miami", doctor=self.doctor) for i in range(5)
+        ])
+
+        pages = []
+        params = {"q": "vacc", "limit": 2}
+        while True:
+            names, next_cursor = self.search(params)
+            pages.append(names)
+            if next_cursor is None:
+                break
+            params = {"q": "vacc", "limit": 2, "cursor": next_cursor}
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(len({name for page in pages for name in page}), 5)
+
+    def test_query_syntax_is_escaped(self):
+        Service.objects.create(name="Pediatrics", address="Austin", doctor=self.doctor)
+
+        self.assertEqual(self.search({"q": 'pedi"* ('})[0], ["Pediatrics"])
+
+    def test_search_requires_query(self):
+        response = self.client.get(reverse("search_services"), {"q": "  "}, headers=self.headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "bad-request")
+
+    def test_rebuild_command_restores_index(self):
+        Service.objects.create(name="Orthopedics", address="Seattle", doctor=self.doctor)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                    "INSERT INTO appointments_api_service_fts(appointments_api_service_fts) VALUES ('delete-all')"
+            )
+        self.assertEqual(self.search({"q": "ortho"})[0], [])
+
+        call_command("rebuild_service_search_index", stdout=StringIO())
+        cache.clear()
+
+        self.assertEqual(self.search({"q": "ortho"})[0], ["Orthopedics"])
+
+class IdempotencyApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed_data = PermissionSeeder.seed_all()
+        cls.admin_group, cls.doctor_group, cls.patient_group = cls.seed_data["groups"]
+
+    def setUp(self):
+        self.client = Client()
+        self.doctor = User.objects.create_user(username='doctor1')
+        self.doctor.groups.add(IdempotencyApiTests.doctor_group)
+        self.patient = User.objects.create_user(username='patient1')
+        self.patient.groups.add(IdempotencyApiTests.patient_group)
+        self.service = Service.objects.create(
+                name="service1", address="New Jersey", doctor=self.doctor
+        )
+        self.data = {"scheduled_at": 1_800_000_000.0, "service_id": self.service.id}
+
+    def create_appointment(self, key, user=None, data=None, url="create_appointment"):
+        headers = {
+            "Authorization": f"Bearer {JWTUtils.generate_tokens(user or self.patient)}",
+            "Idempotency-Key": key,
+        }
+        return self.client.post(
+                reverse(url), json.dumps(data or self.data),
+                content_type="application/json", headers=headers
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.create_appointment("key-1")
+        retry = self.create_appointment("key-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_key_reused_for_different_request(self):
+        self.create_appointment("key-1")
+        response = self.create_appointment("key-1", data={**self.data, "scheduled_at": 1_800_003_600.0})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user(self):
+        other_patient = User.objects.create_user(username='patient2')
+        other_patient.groups.add(IdempotencyApiTests.patient_group)
+
+        self.create_appointment("key-1")
+        response = self.create_appointment("key-1", user=other_patient)
+
+        # executed for real, so it runs into the first booking's slot
+        self.assertNotIn("Idempotent-Replayed", response.headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_request_in_progress_conflicts(self):
+        self.create_appointment("key-1")
+        # as if the first request were still running
+        IdempotencyKey.objects.update(status_code=None, body=None)
+
+        response = self.create_appointment("key-1")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_orphaned_reservation_is_reclaimed_after_lease(self):
+        self.create_appointment("key-1")
+        # as if the process died mid-request: no booking, key still pending
+        Appointment.objects.all().delete()
+        IdempotencyKey.objects.update(
+                status_code=None, body=None, reserved_at=timezone.now() - timedelta(seconds=60)
+        )
+
+        with override_settings(IDEMPOTENCY_IN_PROGRESS_LEASE=30):
+            response = self.create_appointment("key-1")
+            replay = self.create_appointment("key-1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response.headers)
+        self.assertEqual(replay.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_expired_key_executes_again(self):
+        self.create_appointment("key-1")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.create_appointment("key-1")
+
+        self.assertNotIn("Idempotent-Replayed", response.headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_purge_command_deletes_expired_keys_in_batches(self):
+        expired = timezone.now() - timedelta(seconds=1)
+        IdempotencyKey.objects.bulk_create([
+            IdempotencyKey(user=self.patient, key=f"key-{i}", fingerprint="", expires_at=expired)
+            for i in range(5)
+        ])
+        self.create_appointment("live")
+
+        call_command("purge_idempotency_keys", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["live"])
+
+    def test_async_create_service_replays(self):
+        admin = User.objects.create_user(username='admin1')
+        admin.groups.add(IdempotencyApiTests.admin_group)
+        data = {"name": "service2", "address": "Boston", "doctor_id": self.doctor.id}
+
+        first = self.create_appointment("key-1", user=admin, data=data, url="async_create_service")
+        retry = self.create_appointment("key-1", user=admin, data=data, url="async_create_service")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Service.objects.filter(name="service2").count(), 1)
+
+class LoadTestCommandTests(TransactionTestCase):
+    def test_load_test_writes_report(self):
+        call_command(
+                "seed_load_data", patients=2, doctors=1, services=3, appointments=10,
+                prefix="load", start=1_800_000_000, stdout=StringIO()
+        )
+
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                    "load_test", workers=1, requests=12, duration=60, output=output.name,
+                    mix="list_services=1,create_appointment=1,list_appointments=1,delete_appointment=1",
+                    stdout=StringIO()
+            )
+            report = json.loads(Path(output.name).read_text())
+
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertEqual(report["endpoints"]["login"]["requests"], 1)
+        self.assertEqual(report["total"]["requests"], 13)
+        for endpoint in report["endpoints"].values():
+            self.assertEqual(set(endpoint["latency_ms"]), {"mean", "p50", "p95", "p99", "max"})
+            self.assertLessEqual(endpoint["latency_ms"]["p50"], endpoint["latency_ms"]["p99"])
+
+class SlotConstraintMigrationTests(TransactionTestCase):
+    before = [("appointments_api", "0006_add_idempotency_keys")]
+    after = [("appointments_api", "0007_add_appointment_slot_constraint")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def book_twice(self):
+        user = self.apps.get_model("auth", "User").objects.create(username="doctor")
+        service = self.apps.get_model("appointments_api", "Service").objects.create(
+                name="service", address="address", doctor_id=user.id
+        )
+        Appointment = self.apps.get_model("appointments_api", "Appointment")
+        return [
+            Appointment.objects.create(scheduled_at=1_800_000_000, service_id=service.id,
+                                       doctor_id=user.id, patient_id=user.id).id
+            for _ in range(2)
+        ]
+
+    def test_migration_refuses_double_bookings_and_lists_them(self):
+        first, second = self.book_twice()
+
+        with self.assertRaisesMessage(IntegrityError, f"appointments {first}, {second}"):
+            MigrationExecutor(connection).migrate(self.after)
+
+        # nothing was applied, so the operator can clean up and migrate again
+        executor = MigrationExecutor(connection)
+        self.assertNotIn(self.after[0], executor.loader.applied_migrations)
+        self.apps.get_model("appointments_api", "Appointment").objects.filter(id=second).delete()
+        executor.migrate(self.after)
+
+class SlotContentionTests(SimpleTestCase):
+    def test_concurrent_bookings_win_each_slot_once(self):
+        # a subprocess, so the threads race on a file database of their own
+        # instead of this suite's shared in-memory one
+        result = subprocess.run(
+                [sys.executable, "manage.py", "benchmark_slot_contention", "--threads", "8", "--slots", "5", "--json"],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+                env={**os.environ, "DJANGO_SETTINGS_MODULE": "health_linkr.settings"},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        report = json.loads(result.stdout.splitlines()[-1])
+
+        self.assertTrue(report["correct"])
+        self.assertEqual(report["status_codes"], {"201": 5, "409": 35})
+        self.assertEqual(report["double_booked"], 0)
+        self.assertGreater(report["throughput"], 0)
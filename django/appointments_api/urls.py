@@ -1,14 +1,28 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path("services/create", views.create_service, name="create_service"),
     path("services/", views.show_all_services, name="show_all_services"),
+    path("services/search", views.search_services, name="search_services"),
     path("services/<int:service_id>", views.show_service, name="show_service"),
     path("services/<int:service_id>/update", views.update_service, name="update_service"),
     path("services/<int:service_id>/delete", views.delete_service, name="delete_service"),
 
     path("appointments/create", views.create_appointment, name="create_appointment"),
+    path("appointments/bulk_create", views.bulk_create_appointments, name="bulk_create_appointments"),
     path("appointments/", views.show_all_appointments, name="show_all_appointments"),
+    path("appointments/agenda", views.show_doctor_agenda, name="show_doctor_agenda"),
+    path("appointments/availability", views.show_availability, name="show_availability"),
     path("appointments/<int:appointment_id>/delete", views.delete_appointment, name="delete_appointment"),
+
+    path("async/services/create", async_views.create_service, name="async_create_service"),
+    path("async/services/", async_views.show_all_services, name="async_show_all_services"),
+    path("async/services/<int:service_id>", async_views.show_service, name="async_show_service"),
+    path("async/services/<int:service_id>/update", async_views.update_service, name="async_update_service"),
+    path("async/services/<int:service_id>/delete", async_views.delete_service, name="async_delete_service"),
+
+    path("async/appointments/create", async_views.create_appointment, name="async_create_appointment"),
+    path("async/appointments/", async_views.show_all_appointments, name="async_show_all_appointments"),
+    path("async/appointments/<int:appointment_id>/delete", async_views.delete_appointment, name="async_delete_appointment"),
 ]
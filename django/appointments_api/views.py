@@ -1,14 +1,25 @@
 import jwt
 import json
+import time
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth import get_user_model
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from jwt_authentication.decorators import jwt_required, permission_required
+from health_linkr.tasks import run_after_commit
 from django.conf import settings
+from .audit import appointment_row, record_appointment_events
+from .availability import AvailabilityIndex
+from .cache import cached_catalog_response
+from .fields import epoch_microseconds
+from .idempotency import idempotent
 from .models import Service, Appointment
+from .pagination import decode_cursor, encode_cursor, estimated_count, page_limit
+from .search import ServiceSearch
+from .slots import book_slot, is_slot_conflict, parse_scheduled_at, slot_conflict, slot_conflict_response
 
 User = get_user_model()
 
@@ -16,6 +27,7 @@ User = get_user_model()
 @require_http_methods(["POST"])
 @jwt_required
 @permission_required('appointments_api.add_service')
+@idempotent
 def create_service(request):
     try:
         data = json.loads(request.body)
@@ -54,6 +66,7 @@ def create_service(request):
 @require_http_methods(["GET"])
 @jwt_required
 @permission_required('appointments_api.view_service')
+@cached_catalog_response
 def show_service(request, service_id):
     try:
         service = Service.objects.get(id=service_id)
@@ -71,19 +84,147 @@ def show_service(request, service_id):
             "status": "not-found"
         }, status=404)
 
+def stream_services(services, chunk_size):
+    yield '{"services": ['
+    rows = services.values_list("id", "name", "address", "doctor__id", "doctor__username")
+    chunk = []
+    separator = ""
+    for service_id, name, address, doctor_id, doctor_username in rows.iterator(chunk_size=chunk_size):
+        chunk.append(separator + json.dumps({
+            "id": service_id, "name": name, "address": address,
+            "doctor": { "id": doctor_id, "username": doctor_username }
+        }))
+        separator = ", "
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+    yield '], "status": "success"}'
+
 @csrf_exempt
 @require_http_methods(["GET"])
 @jwt_required
 @permission_required('appointments_api.view_service')
+@cached_catalog_response
 def show_all_services(request):
-    services = Service.objects.all()
+    if "ids" in request.GET:
+        return show_services_batch(request)
+
+    services = Service.objects.select_related("doctor")
+    if request.GET.get("stream") in ("1", "true"):
+        chunk_size = getattr(settings, "SERVICES_STREAM_CHUNK_SIZE", 500)
+        return StreamingHttpResponse(
+                stream_services(services, chunk_size),
+                content_type="application/json", status=200
+        )
+
+    try:
+        limit = page_limit(request)
+        cursor = request.GET.get("cursor")
+        if cursor:
+            services = services.filter(id__gt=decode_cursor(cursor))
+    except ValueError as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid query parameters: {e}",
+            "status": "bad-request"
+        }, status=400)
+
+    # keyset pagination: every page is an index range scan on the primary key
+    services = list(services.order_by("id")[:limit + 1])
+    next_cursor = encode_cursor(services[limit - 1].id) if len(services) > limit else None
+    data = {
+        "services": [
+            {
+                "id": service.id, "name": service.name, "address": service.address,
+                "doctor": { "id": service.doctor.id, "username": service.doctor.username }
+            } for service in services[:limit]
+        ],
+        "next": next_cursor,
+        "status": "success"
+    }
+    if request.GET.get("include_total") in ("1", "true"):
+        data["estimated_total"] = estimated_count(Service)
+
+    return JsonResponse(data, status=200)
+
+def batch_ids(request):
+    # unique ids in request order
+    ids = list(dict.fromkeys(parse_ids(request.GET.get("ids"))))
+    max_ids = getattr(settings, "SERVICES_BATCH_MAX_IDS", 100)
+    if not ids:
+        raise ValueError("ids must list at least one service id")
+    if len(ids) > max_ids:
+        raise ValueError(f"at most {max_ids} ids per request")
+    return ids
+
+def show_services_batch(request):
+    try:
+        ids = batch_ids(request)
+    except ValueError as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid query parameters: {e}",
+            "status": "bad-request"
+        }, status=400)
+
+    # one joined query for the whole batch instead of a show_service call per id
+    services = Service.objects.select_related("doctor").in_bulk(ids)
+    return service_batch_response(ids, services)
+
+def service_batch_response(ids, services):
+    results = {}
+    for service_id in ids:
+        service = services.get(service_id)
+        if service is None:
+            results[str(service_id)] = {
+                "error": "Not Found",
+                "message": f"Service not found with id {service_id}",
+                "status": "not-found"
+            }
+            continue
+        results[str(service_id)] = {
+            "id": service.id, "name": service.name, "address": service.address,
+            "doctor": { "id": service.doctor.id, "username": service.doctor.username }
+        }
+
+    return JsonResponse({
+        "services": results,
+        "found": len(services),
+        "missing": len(ids) - len(services),
+        "status": "success"
+    }, status=200)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@jwt_required
+@permission_required('appointments_api.view_service')
+@cached_catalog_response
+def search_services(request):
+    try:
+        limit = page_limit(request)
+        cursor = request.GET.get("cursor")
+        offset = decode_cursor(cursor, kind="offset") if cursor else 0
+        # one extra row tells whether another page exists
+        services = ServiceSearch.search(request.GET.get("q"), limit + 1, offset)
+    except ValueError as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid query parameters: {e}",
+            "status": "bad-request"
+        }, status=400)
+
+    # ranked results have no stable key to seek on, so pages are offsets
+    next_cursor = encode_cursor(offset + limit, kind="offset") if len(services) > limit else None
     return JsonResponse({
         "services": [
             {
                 "id": service.id, "name": service.name, "address": service.address,
                 "doctor": { "id": service.doctor.id, "username": service.doctor.username }
-            } for service in services
+            } for service in services[:limit]
         ],
+        "next": next_cursor,
         "status": "success"
     }, status=200)
 
@@ -172,16 +313,22 @@ def delete_service(request, service_id):
 @require_http_methods(["POST"])
 @jwt_required
 @permission_required('appointments_api.add_appointment')
+@idempotent
 def create_appointment(request):
     try:
         data = json.loads(request.body)
-        scheduled_at = data.get("scheduled_at")
         service_id = data.get("service_id")
+        scheduled_at = parse_scheduled_at(data.get("scheduled_at"))
         service = Service.objects.get(id=service_id)
 
-        appointment = Appointment.objects.create(
-                scheduled_at=float(scheduled_at), service=service,
-                doctor=service.doctor, patient=request.user)
+        try:
+            appointment = book_slot(
+                    scheduled_at=scheduled_at, service=service,
+                    doctor=service.doctor, patient=request.user)
+        except IntegrityError as e:
+            if not is_slot_conflict(e):
+                raise
+            return slot_conflict_response(service_id, scheduled_at)
 
         return JsonResponse({
             "appointment": {
@@ -211,6 +358,115 @@ def create_appointment(request):
             "status": "bad-request"
         }, status=400)
 
+@csrf_exempt
+@require_http_methods(["POST"])
+@jwt_required
+@permission_required('appointments_api.add_appointment')
+def bulk_create_appointments(request):
+    try:
+        data = json.loads(request.body)
+        items = data.get("appointments")
+        max_items = getattr(settings, "APPOINTMENTS_BULK_CREATE_MAX_ITEMS", 500)
+        if not isinstance(items, list) or not items:
+            raise ValueError("appointments must be a non-empty list")
+        if len(items) > max_items:
+            raise ValueError(f"at most {max_items} appointments per request")
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("each appointment must be an object")
+                # same forms create_appointment accepts, e.g. 1 or "1"
+                valid.append((index, parse_id(item.get("service_id")), parse_scheduled_at(item.get("scheduled_at"))))
+            except ValueError as e:
+                results[index] = {
+                    "error": "Data Invalid",
+                    "message": str(e),
+                    "status": "bad-request"
+                }
+
+        services = Service.objects.select_related("doctor").in_bulk(
+                {service_id for _, service_id, _ in valid}
+        )
+
+        pending = []
+        for index, service_id, scheduled_at in valid:
+            service = services.get(service_id)
+            if service is None:
+                results[index] = {
+                    "error": "Not Found",
+                    "message": f"Service not found with id {service_id}",
+                    "status": "not-found"
+                }
+                continue
+
+            pending.append((index, Appointment(
+                    scheduled_at=scheduled_at, service=service,
+                    doctor=service.doctor, patient=request.user)))
+
+        try:
+            with transaction.atomic():
+                Appointment.objects.bulk_create([appointment for _, appointment in pending])
+                # bulk_create skips post_save, so keep the availability index in step here
+                transaction.on_commit(lambda: [
+                    AvailabilityIndex.appointment_added(appointment.doctor_id, appointment.scheduled_at)
+                    for _, appointment in pending
+                ])
+                run_after_commit(
+                        record_appointment_events, "booked",
+                        [appointment_row(appointment) for _, appointment in pending]
+                )
+        except IntegrityError as e:
+            if not is_slot_conflict(e):
+                raise
+            # some slot is taken; only now pay for one savepoint per item to
+            # find out which (save() fires the post_save side effects itself)
+            booked = []
+            with transaction.atomic():
+                for index, appointment in pending:
+                    try:
+                        with transaction.atomic():
+                            appointment.save(force_insert=True)
+                    except IntegrityError as e:
+                        if not is_slot_conflict(e):
+                            raise
+                        results[index] = slot_conflict(appointment.service_id, appointment.scheduled_at)
+                        continue
+                    booked.append((index, appointment))
+            pending = booked
+
+        for index, appointment in pending:
+            results[index] = {
+                "appointment": {
+                    "id": appointment.id, "scheduled_at": appointment.scheduled_at,
+                    "service": { "id": appointment.service.id, "name": appointment.service.name, "address": appointment.service.address },
+                    "doctor": { "id": appointment.doctor.id, "username": appointment.doctor.username },
+                    "patient": { "id": request.user.id, "username": request.user.username }
+                },
+                "status": "created"
+            }
+
+        return JsonResponse({
+            "appointments": results,
+            "created": len(pending),
+            "failed": len(items) - len(pending),
+            "status": "created" if len(pending) == len(items) else "partial"
+        }, status=201 if len(pending) == len(items) else 207)
+    except (ValueError, ValidationError, IntegrityError) as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid request body: {e}",
+            "status": "bad-request"
+        }, status=400)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            "error": "Invalid JSON",
+            "message": "Invalid request body: Expecting valid JSON",
+            "status": "bad-request"
+        }, status=400)
+
 @csrf_exempt
 @require_http_methods(["GET"])
 @jwt_required
@@ -229,6 +485,127 @@ def show_all_appointments(request):
         "status": "success"
     }, status=200)
 
+@csrf_exempt
+@require_http_methods(["GET"])
+@jwt_required
+@permission_required('appointments_api.view_appointment')
+def show_doctor_agenda(request):
+    try:
+        start = parse_seconds(request.GET.get("start", time.time()), "start")
+        end = parse_seconds(request.GET.get("end", start + 24 * 60 * 60), "end")
+        max_limit = getattr(settings, "APPOINTMENTS_AGENDA_MAX_LIMIT", 500)
+        limit = min(int(request.GET.get("limit", 100)), max_limit)
+        if limit < 1 or end < start:
+            raise ValueError("limit must be positive and end must not precede start")
+        cursor = request.GET.get("cursor")
+        after = decode_cursor(cursor, kind="agenda", size=2) if cursor else None
+    except ValueError as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid query parameters: {e}",
+            "status": "bad-request"
+        }, status=400)
+
+    # served straight from the (doctor, scheduled_at) index, already in order
+    appointments = Appointment.objects.filter(doctor=request.user, scheduled_at__gte=start, scheduled_at__lt=end)
+    if after:
+        # keyset on (scheduled_at, id): appointments sharing a start time are
+        # neither repeated nor skipped across pages
+        scheduled_at, appointment_id = after[0] / 1_000_000, after[1]
+        appointments = appointments.filter(
+                Q(scheduled_at__gt=scheduled_at) | Q(scheduled_at=scheduled_at, id__gt=appointment_id)
+        )
+    appointments = list(appointments.select_related("service", "patient").order_by("scheduled_at", "id")[:limit + 1])
+    next_cursor = None
+    if len(appointments) > limit:
+        last = appointments[limit - 1]
+        next_cursor = encode_cursor((round(last.scheduled_at * 1_000_000), last.id), kind="agenda")
+    appointments = appointments[:limit]
+
+    return JsonResponse({
+        "appointments": [
+            {
+                "id": appointment.id, "scheduled_at": float(appointment.scheduled_at),
+                "service": { "id": appointment.service.id, "name": appointment.service.name, "address": appointment.service.address },
+                "patient": { "id": appointment.patient.id, "username": appointment.patient.username }
+            } for appointment in appointments
+        ],
+        "next": next_cursor,
+        "status": "success"
+    }, status=200)
+
+def parse_seconds(value, name):
+    # finite and within what scheduled_at can store, so neither the query nor
+    # the slot arithmetic can overflow
+    try:
+        seconds = float(value)
+        epoch_microseconds(seconds)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{name} must be a finite number of seconds")
+    return seconds
+
+def parse_id(value):
+    # an id as an int or its string form, within the 64-bit primary key range
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"invalid id {value!r}")
+    try:
+        parsed = int(value)
+    except ValueError:
+        raise ValueError(f"invalid id {value!r}")
+    if not -2 ** 63 <= parsed < 2 ** 63:
+        raise ValueError(f"id {value!r} is out of range")
+    return parsed
+
+def parse_ids(value):
+    return [parse_id(item) for item in value.split(",") if item.strip()] if value else []
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@jwt_required
+@permission_required('appointments_api.view_service')
+def show_availability(request):
+    try:
+        service_ids = parse_ids(request.GET.get("service_ids"))
+        doctor_ids = parse_ids(request.GET.get("doctor_ids"))
+        start = parse_seconds(request.GET.get("start", time.time()), "start")
+        end = parse_seconds(request.GET.get("end", start + 7 * 24 * 60 * 60), "end")
+        slot_length = parse_seconds(request.GET.get("slot_length", 30 * 60), "slot_length")
+        max_limit = getattr(settings, "AVAILABILITY_MAX_LIMIT", 100)
+        limit = min(int(request.GET.get("limit", 10)), max_limit)
+        max_doctors = getattr(settings, "AVAILABILITY_MAX_DOCTORS", 50)
+        if not service_ids and not doctor_ids:
+            raise ValueError("service_ids or doctor_ids is required")
+        if len(service_ids) + len(doctor_ids) > max_doctors:
+            raise ValueError(f"at most {max_doctors} services and doctors per search")
+        # sub-second slots would stop advancing at epoch magnitudes
+        if limit < 1 or slot_length < 1 or end < start:
+            raise ValueError("limit must be positive, slot_length at least a second and end must not precede start")
+    except ValueError as e:
+        return JsonResponse({
+            "error": "Data Invalid",
+            "message": f"Invalid query parameters: {e}",
+            "status": "bad-request"
+        }, status=400)
+
+    # unknown doctor ids have no schedule worth loading into the index
+    if doctor_ids:
+        doctor_ids = User.objects.filter(id__in=doctor_ids).values_list("id", flat=True)
+    services_by_doctor = {doctor_id: [] for doctor_id in doctor_ids}
+    for service_id, doctor_id in Service.objects.filter(id__in=service_ids).values_list("id", "doctor_id"):
+        services_by_doctor.setdefault(doctor_id, []).append(service_id)
+
+    slots = AvailabilityIndex.earliest_free_slots(sorted(services_by_doctor), start, end, slot_length, limit)
+    return JsonResponse({
+        "slots": [
+            {
+                "start": slot, "end": slot + slot_length,
+                "doctor": { "id": doctor_id },
+                "service_ids": services_by_doctor[doctor_id]
+            } for slot, doctor_id in slots
+        ],
+        "status": "success"
+    }, status=200)
+
 @csrf_exempt
 @require_http_methods(["DELETE"])
 @jwt_required
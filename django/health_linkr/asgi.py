@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "health_linkr.settings")
 
 application = get_asgi_application()
+
+if settings.DATABASE_SELF_CHECK:
+    from health_linkr.database import database_self_check
+
+    database_self_check()
@@ -0,0 +1,88 @@
+import logging
+
+logger = logging.getLogger("health_linkr.database")
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": 1,  # NORMAL
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB, so 64 MiB
+}
+
+def sqlite_production_settings(pragmas=SQLITE_PRODUCTION_PRAGMAS, conn_max_age=600):
+    # imported by settings.py, so nothing here may touch Django at import time
+    return {
+        "CONN_MAX_AGE": conn_max_age,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # writers take the lock at BEGIN instead of failing on upgrade mid-transaction
+            "transaction_mode": "IMMEDIATE",
+            "timeout": pragmas["busy_timeout"] / 1000,
+            "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in pragmas.items()),
+        },
+    }
+
+def sqlite_replica_settings(primary, name):
+    # same engine and options as the primary, read-only, and pointed at the
+    # primary under test so the test runner does not build a second database
+    options = dict(primary.get("OPTIONS", {}))
+    options["init_command"] = ";".join(filter(None, [options.get("init_command"), "PRAGMA query_only=1"]))
+    return {**primary, "NAME": name, "OPTIONS": options, "TEST": {"MIRROR": "default"}}
+
+def copy_sqlite_database(source, target):
+    # the online backup API gives a consistent snapshot of a live database and
+    # rewrites the target in place, so readers holding it open see the new data
+    import sqlite3
+
+    source_connection = sqlite3.connect(source)
+    target_connection = sqlite3.connect(target)
+    try:
+        source_connection.backup(target_connection)
+    finally:
+        target_connection.close()
+        source_connection.close()
+
+def database_self_check(connection=None):
+    from django.conf import settings
+    from django.db import DatabaseError, connections
+
+    connection = connection or connections["default"]
+    alias = connection.alias
+    report = {
+        "alias": alias,
+        "vendor": connection.vendor,
+        "profile": getattr(settings, "DATABASE_PROFILE", None),
+        "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+        "conn_health_checks": connection.settings_dict.get("CONN_HEALTH_CHECKS"),
+        "transaction_mode": connection.settings_dict.get("OPTIONS", {}).get("transaction_mode"),
+        "pragmas": {},
+        "mismatches": {},
+    }
+
+    if connection.vendor == "sqlite":
+        # runs at wsgi/asgi import, so it reports problems instead of raising
+        try:
+            with connection.cursor() as cursor:
+                for name in SQLITE_PRODUCTION_PRAGMAS:
+                    cursor.execute(f"PRAGMA {name}")
+                    row = cursor.fetchone()
+                    # no row: not available here, e.g. mmap_size on an in-memory database
+                    report["pragmas"][name] = row[0] if row else None
+        except DatabaseError as e:
+            logger.warning("database %s: self-check could not read pragmas: %s", alias, e)
+
+        if report["profile"] == "production":
+            for name, expected in SQLITE_PRODUCTION_PRAGMAS.items():
+                actual = report["pragmas"].get(name)
+                if str(actual).lower() != str(expected).lower():
+                    report["mismatches"][name] = {"expected": expected, "actual": actual}
+
+    logger.info("database %(alias)s (%(vendor)s, profile %(profile)s): conn_max_age=%(conn_max_age)s "
+                "health_checks=%(conn_health_checks)s transaction_mode=%(transaction_mode)s "
+                "pragmas=%(pragmas)s", report)
+    for name, mismatch in report["mismatches"].items():
+        logger.warning("database %s: PRAGMA %s is %r, expected %r",
+                       alias, name, mismatch["actual"], mismatch["expected"])
+
+    return report
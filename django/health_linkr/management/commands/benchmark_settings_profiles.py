@@ -0,0 +1,83 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in a fresh interpreter per sample so imports are really cold; the
+# request loop goes through the full WSGI handler to /api/ping/, which has no
+# database work, so what remains is middleware and URL resolution
+PROBE = """
+import io, json, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.conf import settings
+application = get_wsgi_application()
+startup = time.perf_counter() - started
+
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": "/api/ping/", "QUERY_STRING": "",
+    "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+    "wsgi.url_scheme": "http", "wsgi.errors": sys.stderr,
+}
+def start_response(status, headers):
+    assert status.startswith("200"), status
+
+def request():
+    b"".join(application({**environ, "wsgi.input": io.BytesIO()}, start_response))
+
+requests = int(sys.argv[1])
+for _ in range(min(50, requests)):
+    request()
+started = time.perf_counter()
+for _ in range(requests):
+    request()
+per_request = (time.perf_counter() - started) / requests
+
+print(json.dumps({
+    "startup": startup, "per_request": per_request,
+    "apps": len(settings.INSTALLED_APPS), "middleware": len(settings.MIDDLEWARE),
+    "modules": len(sys.modules),
+}))
+"""
+
+class Command(BaseCommand):
+    help = (
+        'Compare cold-start time and per-request middleware overhead of the full '
+        'and API-only (HEALTH_LINKR_APP_PROFILE=api) settings profiles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['full', 'api'])
+        parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per profile')
+        parser.add_argument('--requests', type=int, default=2000, help='requests timed per run')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{options["runs"]} cold starts per profile, {options["requests"]} requests per run')
+        for profile in options['profiles']:
+            samples = [self.sample(profile, options['requests']) for _ in range(options['runs'])]
+            first = samples[0]
+            self.stdout.write(
+                f'{profile:>5}: {first["apps"]} apps, {first["middleware"]} middleware, '
+                f'{first["modules"]} modules loaded, '
+                f'startup {statistics.median(s["startup"] for s in samples) * 1000:7.1f}ms, '
+                f'{statistics.median(s["per_request"] for s in samples) * 1_000_000:6.1f}us per request'
+            )
+
+    def sample(self, profile, requests):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "health_linkr.settings"),
+            "HEALTH_LINKR_APP_PROFILE": profile,
+            # keep opt-in instrumentation out of the comparison
+            "HEALTH_LINKR_REQUEST_PROFILING": "0",
+        }
+        result = subprocess.run(
+                [sys.executable, "-c", PROBE, str(requests)],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'profile {profile!r} failed:\n{result.stderr}')
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,34 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from health_linkr.database import copy_sqlite_database
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database onto every replica in DATABASE_REPLICAS, '
+        'once or every --interval seconds'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='repeat every N seconds; keep it below DATABASE_REPLICA_STICKY_SECONDS')
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas:
+            raise CommandError('no replicas configured; set HEALTH_LINKR_REPLICA_PATHS')
+        for alias in ['default', *replicas]:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'database {alias!r} is not SQLite')
+
+        source = connections['default'].settings_dict['NAME']
+        while True:
+            started = time.perf_counter()
+            for alias in replicas:
+                copy_sqlite_database(source, connections[alias].settings_dict['NAME'])
+            self.stdout.write(f'copied {source} to {len(replicas)} replicas in {time.perf_counter() - started:.3f}s')
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,329 @@
+import cProfile
+import hmac
+import logging
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .routers import pin_cache, pins_shared, replica_aliases, replica_reads
+
+logger = logging.getLogger("health_linkr.timing")
+profiling_logger = logging.getLogger("health_linkr.profiling")
+database_logger = logging.getLogger("health_linkr.database")
+
+# cProfile allows one active profiler per interpreter from Python 3.12 on, and
+# overlapping async captures would steal each other's profiler before that
+_capture_lock = threading.Lock()
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            statement = self.statements[sql]
+            statement[0] += 1
+            statement[1] += elapsed
+
+    def top_statements(self, limit):
+        return sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+
+class QueryTimingMiddleware:
+    # opt-in via REQUEST_TIMING_ENABLED; keep it first in MIDDLEWARE so "mw"
+    # covers every request-phase middleware, JWT authentication included
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def start(self, request, stack):
+        recorder = QueryRecorder()
+        request._timing_started = time.perf_counter()
+        request._timing_view_started = None
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return recorder
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with ExitStack() as stack:
+            recorder = self.start(request, stack)
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        # connections are per thread and async ORM calls run in the request's
+        # sync_to_async thread, so the wrappers go on that thread's connections
+        stack = ExitStack()
+        recorder = await sync_to_async(self.start)(request, stack)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        finished = time.perf_counter()
+        total = finished - request._timing_started
+        view_started = request._timing_view_started or finished
+        metrics = [
+            f"total;dur={total * 1000:.2f}",
+            f"mw;dur={(view_started - request._timing_started) * 1000:.2f}",
+            f"view;dur={(finished - view_started) * 1000:.2f}",
+            f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+        ]
+        existing = response.headers.get("Server-Timing")
+        response.headers["Server-Timing"] = ", ".join(filter(None, [existing, *metrics]))
+
+        self.log_slow_request(request, response, total, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_started = time.perf_counter()
+
+    def log_slow_request(self, request, response, total, recorder):
+        slow_ms = getattr(settings, "REQUEST_TIMING_SLOW_MS", 500)
+        slow_query_count = getattr(settings, "REQUEST_TIMING_SLOW_QUERY_COUNT", 20)
+        if total * 1000 < slow_ms and recorder.count < slow_query_count:
+            return
+
+        top = getattr(settings, "REQUEST_TIMING_TOP_STATEMENTS", 5)
+        statements = "".join(
+            f"\n  {count}x {duration * 1000:.2f}ms {sql}"
+            for sql, (count, duration) in recorder.top_statements(top)
+        )
+        logger.warning(
+            "slow request %s %s -> %s: %.2fms total, %d queries in %.2fms%s",
+            request.method, request.path, response.status_code,
+            total * 1000, recorder.count, recorder.duration * 1000, statements,
+        )
+
+class ReplicaRoutingMiddleware:
+    # place after JWTAuthenticationMiddleware: the user it loads is what pins
+    # a client to the primary, and its own lookups always use the primary
+    sync_capable = True
+    async_capable = True
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed()
+        if not pins_shared():
+            # without shared pins every read stays on the primary
+            database_logger.warning(
+                "replica reads disabled: DATABASE_REPLICA_PIN_CACHE is per-process, "
+                "so clients could not read their own writes across workers"
+            )
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.cache = pin_cache()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def pin_key(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"health_linkr:primary_pin:user:{user.pk}"
+        return f"health_linkr:primary_pin:addr:{request.META.get('REMOTE_ADDR')}"
+
+    def pin(self, key):
+        # long enough for the copy job to catch up with this client's write
+        return key, True, getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 5)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        key = self.pin_key(request)
+        if request.method not in self.SAFE_METHODS:
+            response = self.get_response(request)
+            self.cache.set(*self.pin(key))
+            return response
+
+        with replica_reads(not self.cache.get(key)):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        key = self.pin_key(request)
+        if request.method not in self.SAFE_METHODS:
+            response = await self.get_response(request)
+            await self.cache.aset(*self.pin(key))
+            return response
+
+        with replica_reads(not await self.cache.aget(key)):
+            return await self.get_response(request)
+
+def collapsed_stacks(stats, root, max_depth=64, resolution=1e-4):
+    # cProfile keeps caller->callee edges, not whole stacks, so a function's
+    # time is split between its callers by edge cumulative time. Recursion
+    # (every middleware layer runs the same wrapper) double-counts edges, so
+    # children never get more than their parent, and branches under
+    # `resolution` of the total are dropped to keep the enumeration bounded
+    def label(func):
+        filename, lineno, name = func
+        if filename == "~":
+            return name.replace(";", ":")
+        return f"{name} ({Path(filename).name}:{lineno})".replace(";", ":")
+
+    if root not in stats.stats:
+        return []
+
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    lines = defaultdict(float)
+    threshold = max(1e-6, stats.stats[root][3] * resolution)
+
+    def walk(func, path, inclusive):
+        _, _, own, total, _ = stats.stats[func]
+        children = callees[func]
+        # what the edges claim can exceed the total under recursion
+        scale = inclusive / max(total, own + sum(children.values()), 1e-12)
+        path = path + [label(func)]
+        lines[";".join(path)] += own * scale
+        if len(path) >= max_depth:
+            return
+        for callee, edge_time in children.items():
+            if edge_time * scale >= threshold:
+                walk(callee, path, edge_time * scale)
+
+    walk(root, [], stats.stats[root][3])
+    return [f"{stack} {round(seconds * 1_000_000)}" for stack, seconds in lines.items() if round(seconds * 1_000_000)]
+
+class ProfilingMiddleware:
+    # opt-in via REQUEST_PROFILING_ENABLED; place right after
+    # QueryTimingMiddleware so JWT, permission and view code are all profiled
+    sync_capable = True
+    async_capable = True
+    HEADER = "X-Profile-Request"
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.directory = Path(getattr(settings, "REQUEST_PROFILING_DIR", settings.BASE_DIR / "profiles"))
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def should_profile(self, request):
+        token = getattr(settings, "REQUEST_PROFILING_TOKEN", None)
+        supplied = request.headers.get(self.HEADER)
+        if token and supplied and hmac.compare_digest(supplied.encode(), token.encode()):
+            return True
+        return random.random() < getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0.0)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        # a dedicated entry point gives the collapsed stacks a single root
+        def profiled_request():
+            return self.get_response(request)
+
+        profiler = self.start_capture()
+        if profiler is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = profiled_request()
+        finally:
+            self.stop_capture(profiler)
+        self.finish(request, response, profiler, time.perf_counter() - started, profiled_request.__code__)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        async def profiled_request():
+            return await self.get_response(request)
+
+        # cProfile follows the event loop thread only: ORM calls run in
+        # sync_to_async threads and show up as waits, and other requests
+        # interleaved on the loop meanwhile are counted in as well
+        profiler = self.start_capture()
+        if profiler is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        try:
+            response = await profiled_request()
+        finally:
+            self.stop_capture(profiler)
+        elapsed = time.perf_counter() - started
+        await sync_to_async(self.finish, thread_sensitive=False)(
+                request, response, profiler, elapsed, profiled_request.__code__
+        )
+        return response
+
+    def start_capture(self):
+        # a request that finds another capture running, here or from another
+        # profiling tool, is served unprofiled rather than failing
+        if not _capture_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            _capture_lock.release()
+            return None
+        return profiler
+
+    def stop_capture(self, profiler):
+        profiler.disable()
+        _capture_lock.release()
+
+    def finish(self, request, response, profiler, elapsed, code):
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:12]}"
+        self.store(profile_id, pstats.Stats(profiler), (code.co_filename, code.co_firstlineno, code.co_name))
+        response.headers["X-Profile-Id"] = profile_id
+        profiling_logger.info(
+            "profiled %s %s -> %s in %.2fms as %s",
+            request.method, request.path, response.status_code, elapsed * 1000, profile_id,
+        )
+
+    def store(self, profile_id, stats, root):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(self.directory / f"{profile_id}.pstats")
+        (self.directory / f"{profile_id}.collapsed").write_text("".join(f"{line}\n" for line in collapsed_stacks(stats, root)))
+        self.rotate()
+
+    def rotate(self):
+        keep = getattr(settings, "REQUEST_PROFILING_MAX_PROFILES", 50)
+        dumps = []
+        for dump in self.directory.glob("*.pstats"):
+            try:
+                dumps.append((dump.stat().st_mtime, dump))
+            except FileNotFoundError:
+                # rotated away by a concurrent request
+                continue
+        dumps.sort(reverse=True)
+        for _, dump in dumps[keep:]:
+            dump.unlink(missing_ok=True)
+            dump.with_suffix(".collapsed").unlink(missing_ok=True)
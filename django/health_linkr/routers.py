@@ -0,0 +1,56 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# off unless ReplicaRoutingMiddleware turns it on for a safe-method request,
+# so management commands, migrations and tests always read the primary
+_replica_reads = ContextVar("replica_reads", default=False)
+
+def replica_aliases():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+def pin_cache():
+    return caches[getattr(settings, "DATABASE_REPLICA_PIN_CACHE", "default")]
+
+def pins_shared():
+    # a client pinned to the primary by one worker must stay pinned on every
+    # other, or its next read may miss its own write
+    shared = getattr(settings, "DATABASE_REPLICA_PIN_CACHE_SHARED", None)
+    if shared is not None:
+        return shared
+    return not isinstance(pin_cache(), (LocMemCache, DummyCache))
+
+@contextmanager
+def replica_reads(enabled=True):
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas are copies of the primary, so rows from any of them relate
+        aliases = {"default", *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # replicas receive the schema through the copy job
+        if db in replica_aliases():
+            return False
+        return None
@@ -10,8 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
+from .database import sqlite_production_settings, sqlite_replica_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,26 +42,131 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    # project-level management commands (database, settings profiles)
+    "health_linkr",
     "appointments_api",
+    "jwt_authentication",
+    "users_api",
 ]
 
 MIDDLEWARE = [
+    "health_linkr.middleware.QueryTimingMiddleware",
+    "health_linkr.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "jwt_authentication.middleware.JWTAuthenticationMiddleware",
+    "health_linkr.middleware.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# "api" serves only the JSON API: no admin, sessions, messages or static
+# files, and none of their middleware. Every endpoint is csrf_exempt and
+# authenticates with JWT, so nothing the API uses is lost.
+APP_PROFILE = os.environ.get("HEALTH_LINKR_APP_PROFILE", "full")
+
+if APP_PROFILE == "api":
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+    )]
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    )]
+elif APP_PROFILE != "full":
+    raise ImproperlyConfigured(f"Unknown HEALTH_LINKR_APP_PROFILE {APP_PROFILE!r}")
+
+# Server-Timing headers and slow-request logging, see health_linkr.middleware
+REQUEST_TIMING_ENABLED = False
+REQUEST_TIMING_SLOW_MS = 500
+REQUEST_TIMING_SLOW_QUERY_COUNT = 20
+REQUEST_TIMING_TOP_STATEMENTS = 5
+
+# On-demand cProfile capture, see health_linkr.middleware.ProfilingMiddleware.
+# A request is profiled when its X-Profile-Request header matches the token
+# or it falls within the sample rate; dumps rotate in REQUEST_PROFILING_DIR.
+REQUEST_PROFILING_ENABLED = os.environ.get("HEALTH_LINKR_REQUEST_PROFILING") == "1"
+REQUEST_PROFILING_TOKEN = os.environ.get("HEALTH_LINKR_PROFILING_TOKEN")
+REQUEST_PROFILING_SAMPLE_RATE = 0.0
+REQUEST_PROFILING_DIR = BASE_DIR / "profiles"
+REQUEST_PROFILING_MAX_PROFILES = 50
+
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
+    'jwt_authentication.passwords.PooledPasswordBackend',
 ]
 
+# password hashing/verification runs on a bounded pool, see jwt_authentication.passwords.
+# The last queued request waits about (workers + max_pending) / workers hashes
+# (~0.4s each at Django's PBKDF2 default), so keep that well under the timeout:
+# 9 rounds here is ~4s; a timed-out caller gets the same 503 as a refused one.
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_MAX_PENDING = 32
+PASSWORD_HASHING_TIMEOUT = 10
+
 JWT_ACCESS_TOKEN_LIFETIME = 30
 JWT_SUBJECT_ATTRIBUTES_AS_ADDITIONAL_CLAIMS = []
+JWT_USER_CACHE_SIZE = 1024
+JWT_USER_CACHE_TTL = 60
+JWT_TOKEN_CACHE_SIZE = 4096
+JWT_TOKEN_CACHE_TTL = 300
+# sized for the number of tokens revoked within one access token lifetime
+JWT_REVOCATION_BLOOM_CAPACITY = 100_000
+JWT_REVOCATION_BLOOM_ERROR_RATE = 0.001
+JWT_REVOCATION_REBUILD_INTERVAL = 60
+# embedded into tokens as a bitset; bit positions follow list order, so only append
+JWT_PERMISSION_CLAIMS = [
+    "appointments_api.add_service",
+    "appointments_api.view_service",
+    "appointments_api.change_service",
+    "appointments_api.delete_service",
+    "appointments_api.add_appointment",
+    "appointments_api.view_appointment",
+    "appointments_api.change_appointment",
+    "appointments_api.delete_appointment",
+]
+# permission versions invalidate claims across processes, so they need a cache
+# every worker shares (redis, memcached, database); with a per-process cache
+# (locmem, dummy) claims are not issued and permissions come from the database.
+# JWT_PERMISSION_VERSION_CACHE_SHARED overrides that detection.
+JWT_PERMISSION_VERSION_CACHE = "default"
+JWT_PERMISSION_VERSION_CACHE_SHARED = None
+
+SERVICES_STREAM_CHUNK_SIZE = 500
+SERVICES_CACHE_ALIAS = "default"
+SERVICES_CACHE_TTL = 60
+SERVICES_PAGE_SIZE = 100
+SERVICES_MAX_PAGE_SIZE = 500
+# bm25 column weights for (name, address)
+SERVICES_SEARCH_WEIGHTS = (10.0, 1.0)
+SERVICES_SEARCH_MAX_TERMS = 8
+# services/?ids=1,2,3 multi-get
+SERVICES_BATCH_MAX_IDS = 100
+ESTIMATED_COUNT_TTL = 300
+# Idempotency-Key support on create_service and create_appointment
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+IDEMPOTENCY_PURGE_INTERVAL = 60
+IDEMPOTENCY_PURGE_BATCH_SIZE = 1000
+# seconds a pending reservation is honoured before a retry may take it over
+IDEMPOTENCY_IN_PROGRESS_LEASE = 30
+APPOINTMENTS_BULK_CREATE_MAX_ITEMS = 500
+APPOINTMENTS_AGENDA_MAX_LIMIT = 500
+APPOINTMENT_DURATION = 30 * 60
+# seconds; when set, bookings must start on a multiple of it, so the unique
+# (service, scheduled_at) constraint allows one booking per slot
+APPOINTMENT_SLOT_GRANULARITY = None
+AVAILABILITY_INDEX_SIZE = 1024
+AVAILABILITY_INDEX_TTL = 60
+AVAILABILITY_MAX_LIMIT = 100
+AVAILABILITY_MAX_DOCTORS = 50
 
 ROOT_URLCONF = "health_linkr.urls"
 
@@ -88,6 +198,47 @@ DATABASES = {
     }
 }
 
+# "production" adds WAL and friends, persistent connections and a startup
+# self-check (see health_linkr.database)
+DATABASE_PROFILE = os.environ.get("HEALTH_LINKR_DATABASE_PROFILE", "development")
+
+if DATABASE_PROFILE == "production":
+    DATABASES["default"].update(sqlite_production_settings(
+        conn_max_age=int(os.environ.get("HEALTH_LINKR_CONN_MAX_AGE", 600)),
+    ))
+elif DATABASE_PROFILE != "development":
+    raise ImproperlyConfigured(f"Unknown HEALTH_LINKR_DATABASE_PROFILE {DATABASE_PROFILE!r}")
+
+DATABASE_SELF_CHECK = DATABASE_PROFILE == "production"
+
+# Read replicas: comma-separated SQLite files refreshed from the primary by
+# `manage.py sync_sqlite_replicas`. Safe-method requests read from them unless
+# the client wrote within DATABASE_REPLICA_STICKY_SECONDS.
+DATABASE_REPLICAS = []
+for index, path in enumerate(filter(None, os.environ.get("HEALTH_LINKR_REPLICA_PATHS", "").split(",")), 1):
+    DATABASES[f"replica{index}"] = sqlite_replica_settings(DATABASES["default"], path)
+    DATABASE_REPLICAS.append(f"replica{index}")
+
+DATABASE_ROUTERS = ["health_linkr.routers.ReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = 5
+# the pin keeping a writer on the primary must be seen by every worker; with a
+# per-process cache (locmem, dummy) replica reads stay off.
+# DATABASE_REPLICA_PIN_CACHE_SHARED overrides that detection.
+DATABASE_REPLICA_PIN_CACHE = "default"
+DATABASE_REPLICA_PIN_CACHE_SHARED = None
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "health_linkr",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -108,6 +259,42 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+# appointment audit events are a record, not diagnostics: they go to
+# HEALTH_LINKR_AUDIT_LOG when set and are dropped otherwise, so they never
+# end up in console or test output
+AUDIT_LOG_FILE = os.environ.get("HEALTH_LINKR_AUDIT_LOG")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "audit": {"format": "%(asctime)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+        "audit": (
+            {"class": "logging.handlers.WatchedFileHandler", "filename": AUDIT_LOG_FILE, "formatter": "audit"}
+            if AUDIT_LOG_FILE else {"class": "logging.NullHandler"}
+        ),
+    },
+    "loggers": {
+        "health_linkr": {"handlers": ["console"], "level": "INFO"},
+        "appointments_api.audit": {"handlers": ["audit"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Post-commit side effects, see health_linkr.tasks
+BACKGROUND_TASK_WORKERS = 4
+BACKGROUND_TASK_MAX_QUEUE = 1000
+BACKGROUND_TASK_MAX_RETRIES = 3
+BACKGROUND_TASK_RETRY_BACKOFF = 0.5
+BACKGROUND_TASK_RETRY_BACKOFF_MAX = 30.0
+BACKGROUND_TASK_DRAIN_TIMEOUT = 10
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
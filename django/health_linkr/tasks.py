@@ -0,0 +1,163 @@
+import atexit
+import logging
+import queue
+import random
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger("health_linkr.tasks")
+
+class TaskQueueFull(Exception):
+    pass
+
+class TaskExecutor:
+    # in-process, so queued work is lost if the process dies; only for side
+    # effects that can be dropped (notifications, cache refreshes, audit logs)
+    def __init__(self, name, workers=4, max_queue=1000, max_retries=3, backoff=0.5, backoff_max=30.0):
+        self.name = name
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._accepting = True
+        self._lock = threading.Lock()
+        # counts queued, running and waiting-to-retry tasks, for drain()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._running = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "retried": 0, "rejected": 0}
+
+    @staticmethod
+    def from_settings(name="default"):
+        return TaskExecutor(
+                name,
+                workers=getattr(settings, "BACKGROUND_TASK_WORKERS", 4),
+                max_queue=getattr(settings, "BACKGROUND_TASK_MAX_QUEUE", 1000),
+                max_retries=getattr(settings, "BACKGROUND_TASK_MAX_RETRIES", 3),
+                backoff=getattr(settings, "BACKGROUND_TASK_RETRY_BACKOFF", 0.5),
+                backoff_max=getattr(settings, "BACKGROUND_TASK_RETRY_BACKOFF_MAX", 30.0),
+        )
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"tasks-{self.name}-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _count(self, counter, pending=0):
+        with self._lock:
+            self._counters[counter] += 1
+            self._pending += pending
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def submit(self, func, *args, **kwargs):
+        # never blocks the caller: a full queue is rejected, not waited on
+        if not self._accepting:
+            raise TaskQueueFull(f"{self.name} executor is shutting down")
+        self._start()
+        with self._lock:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((func, args, kwargs, 0))
+        except queue.Full:
+            self._count("rejected", pending=-1)
+            raise TaskQueueFull(f"{self.name} executor queue is full")
+        self._count("submitted")
+
+    def submit_on_commit(self, func, *args, using=None, **kwargs):
+        # nothing runs for a rolled-back transaction; outside one it runs now
+        def enqueue():
+            try:
+                self.submit(func, *args, **kwargs)
+            except TaskQueueFull as e:
+                logger.warning("dropped task %s: %s", getattr(func, "__name__", func), e)
+
+        transaction.on_commit(enqueue, using=using)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            func, args, kwargs, attempt = item
+            with self._lock:
+                self._running += 1
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                self._retry_or_fail(func, args, kwargs, attempt)
+            else:
+                self._count("completed", pending=-1)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                # tasks run outside the request cycle, which normally does this
+                close_old_connections()
+
+    def _retry_or_fail(self, func, args, kwargs, attempt):
+        name = getattr(func, "__name__", func)
+        if attempt >= self.max_retries:
+            logger.exception("task %s failed after %d attempts", name, attempt + 1)
+            self._count("failed", pending=-1)
+            return
+
+        # full jitter keeps a failing dependency from being hit in lockstep
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        logger.warning("task %s failed, retrying in %.2fs", name, delay, exc_info=True)
+        self._count("retried")
+
+        def requeue():
+            # may wait for room: the task was already accepted
+            self._queue.put((func, args, kwargs, attempt + 1))
+
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True
+        timer.start()
+
+    def drain(self, timeout=None):
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self, timeout=None):
+        # stop taking work, let queued tasks and pending retries finish, then
+        # stop the workers; returns False if work was still pending at timeout
+        self._accepting = False
+        drained = self.drain(timeout)
+        if not drained:
+            logger.warning("%s executor shut down with %d tasks pending", self.name, self._pending)
+        for _ in self._threads:
+            try:
+                self._queue.put(None, timeout=1)
+            except queue.Full:
+                # workers are daemons; whatever is left dies with the process
+                break
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        return drained
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "running": self._running,
+                "pending": self._pending,
+                "workers": len(self._threads),
+                **self._counters,
+            }
+
+background_tasks = TaskExecutor.from_settings()
+
+def run_after_commit(func, *args, using=None, **kwargs):
+    background_tasks.submit_on_commit(func, *args, using=using, **kwargs)
+
+atexit.register(lambda: background_tasks.shutdown(timeout=getattr(settings, "BACKGROUND_TASK_DRAIN_TIMEOUT", 10)))
@@ -15,6 +15,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.apps import apps
 from django.contrib import admin
 from django.urls import include, path
 from django.http import JsonResponse
@@ -24,9 +25,12 @@ def ping(request):
     return JsonResponse(data)
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path("api/ping/", ping, name="ping"),
     path("api/", include("jwt_authentication.urls")),
     path("api/", include("users_api.urls")),
     path("api/", include("appointments_api.urls"))
 ]
+
+# absent from the API-only profile (HEALTH_LINKR_APP_PROFILE=api)
+if apps.is_installed("django.contrib.admin"):
+    urlpatterns.append(path("admin/", admin.site.urls))
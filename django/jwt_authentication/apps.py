@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JwtAuthenticationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "jwt_authentication"
+
+    def ready(self):
+        from . import signals
@@ -1,30 +1,63 @@
 from functools import wraps
+from asgiref.sync import iscoroutinefunction
 from django.http import JsonResponse
 from django.contrib.auth.models import AnonymousUser
+from .permissions import PermissionClaims
+
+def authentication_required_response():
+    return JsonResponse({
+        "error": "Authentication Required",
+        "message": "Valid JWT token required",
+        "status": "unauthorized"
+    }, status=401)
+
+def permission_denied_response(permission_name):
+    return JsonResponse({
+        "error": "Permission Denied",
+        "message": f"You do not have the required permission: '{permission_name}'",
+        "status": "forbidden"
+    }, status=403)
 
 def jwt_required(view_func):
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if isinstance(request.user, AnonymousUser):
+                return authentication_required_response()
+
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         if isinstance(request.user, AnonymousUser):
-            return JsonResponse({
-                "error": "Authentication Required",
-                "message": "Valid JWT token required",
-                "status": "unauthorized"
-            }, status=401)
+            return authentication_required_response()
 
         return view_func(request, *args, **kwargs)
     return wrapper
 
 def permission_required(permission_name):
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                allowed = PermissionClaims.has_perm(getattr(request, 'jwt_payload', None), permission_name)
+                if allowed is None:
+                    allowed = await request.user.ahas_perm(permission_name)
+
+                if not allowed:
+                    return permission_denied_response(permission_name)
+                return await view_func(request, *args, **kwargs)
+            return async_wrapper
+
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            if not request.user.has_perm(permission_name):
-                return JsonResponse({
-                    "error": "Permission Denied",
-                    "message": f"You do not have the required permission: '{permission_name}'",
-                    "status": "forbidden"
-                }, status=403)
+            allowed = PermissionClaims.has_perm(getattr(request, 'jwt_payload', None), permission_name)
+            if allowed is None:
+                allowed = request.user.has_perm(permission_name)
+
+            if not allowed:
+                return permission_denied_response(permission_name)
             return view_func(request, *args, **kwargs)
         return wrapper
     return decorator
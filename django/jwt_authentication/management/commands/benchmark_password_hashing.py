@@ -0,0 +1,67 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand
+from jwt_authentication.passwords import PasswordHashingBusy, PasswordHasherPool
+
+class Command(BaseCommand):
+    help = (
+        'Measure PBKDF2 verification latency and login throughput through the '
+        'password hashing pool for several iteration counts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, nargs='+',
+                            default=[100_000, 300_000, PBKDF2PasswordHasher.iterations])
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help='simulated request workers submitting logins')
+
+    def handle(self, *args, **options):
+        workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 4)
+        self.stdout.write(
+            f'{options["logins"]} logins per run, {options["concurrency"]} request workers, '
+            f'{workers} hashing workers'
+        )
+
+        PasswordHasherPool.shutdown()
+        try:
+            for iterations in options['iterations']:
+                self.benchmark(iterations, options)
+        finally:
+            PasswordHasherPool.shutdown()
+
+    def benchmark(self, iterations, options):
+        hasher = type('BenchmarkHasher', (PBKDF2PasswordHasher,), {'iterations': iterations})()
+        encoded = hasher.encode('password', hasher.salt())
+
+        single = []
+        for _ in range(5):
+            started = time.perf_counter()
+            hasher.verify('password', encoded)
+            single.append(time.perf_counter() - started)
+
+        def login(_):
+            started = time.perf_counter()
+            try:
+                PasswordHasherPool.run(hasher.verify, 'password', encoded)
+            except PasswordHashingBusy:
+                return None
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(login, range(options['logins'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(result for result in results if result is not None)
+        rejected = len(results) - len(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+        self.stdout.write(
+            f'{iterations:>9,} iterations: {statistics.median(single) * 1000:7.1f}ms per hash, '
+            f'{len(latencies) / elapsed:7.1f} logins/s, '
+            f'p50 {statistics.median(latencies) * 1000 if latencies else 0.0:7.1f}ms, '
+            f'p95 {p95 * 1000:7.1f}ms, {rejected} rejected'
+        )
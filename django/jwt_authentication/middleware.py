@@ -1,28 +1,81 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
 from .utils import JWTUtils
+from .revocation import TokenRevocationList
+from .users import UserCache
+from . import signals  # connects user cache invalidation receivers
 import json
 
 User = get_user_model()
 
 class JWTAuthenticationMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         self.process_request(request)
         response = self.get_response(request)
         return response
 
-    def process_request(self, request):
+    async def __acall__(self, request):
+        await self.aprocess_request(request)
+        response = await self.get_response(request)
+        return response
+
+    def bearer_payload(self, request):
         auth_header = request.META.get('HTTP_AUTHORIZATION')
 
         if auth_header and auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
-            payload = JWTUtils.validate_token(token)
+            return True, JWTUtils.validate_token(token)
+        else:
+            return False, None
+
+    def process_request(self, request):
+        has_token, payload = self.bearer_payload(request)
+
+        if payload and TokenRevocationList.is_revoked(payload.get('jti')):
+            payload = None
+
+        if has_token:
+            if payload:
+                try:
+                    user = UserCache.get_user(payload['sub'])
+                    request.user = user
+                    request.jwt_payload = payload
+                except User.DoesNotExist:
+                    request.user = AnonymousUser()
+                    request.jwt_payload = None
+            else:
+                request.user = AnonymousUser()
+                request.jwt_payload = None
+        elif not hasattr(request, 'user'):
+            # no session auth in front of us (API-only profile)
+            request.user = AnonymousUser()
+            request.jwt_payload = None
+        else:
+            # don't block other auth middleware (e.g. session-based auth)
+            pass
+
+    async def aprocess_request(self, request):
+        has_token, payload = self.bearer_payload(request)
+
+        if payload and await TokenRevocationList.ais_revoked(payload.get('jti')):
+            payload = None
+
+        if has_token:
             if payload:
                 try:
-                    user = User.objects.get(id=payload['sub'])
+                    user = await UserCache.aget_user(payload['sub'])
                     request.user = user
                     request.jwt_payload = payload
                 except User.DoesNotExist:
@@ -31,6 +84,10 @@ class JWTAuthenticationMiddleware:
             else:
                 request.user = AnonymousUser()
                 request.jwt_payload = None
+        elif not hasattr(request, 'user'):
+            # no session auth in front of us (API-only profile)
+            request.user = AnonymousUser()
+            request.jwt_payload = None
         else:
             # don't block other auth middleware (e.g. session-based auth)
             pass
@@ -1,3 +1,7 @@
 from django.db import models
 
-# Create your models here.
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=64, unique=True)
+    # rows are only needed until the token would have expired anyway
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
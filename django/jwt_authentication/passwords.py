@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+User = get_user_model()
+
+class PasswordHashingBusy(Exception):
+    pass
+
+class PasswordHasherPool:
+    # password hashing is deliberately slow; running it on a small dedicated
+    # pool keeps a login burst from occupying every request worker
+    _executor = None
+    _slots = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _pool():
+        if PasswordHasherPool._executor is None:
+            with PasswordHasherPool._lock:
+                if PasswordHasherPool._executor is None:
+                    workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 4)
+                    max_pending = getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', 64)
+                    PasswordHasherPool._slots = threading.BoundedSemaphore(workers + max_pending)
+                    PasswordHasherPool._executor = ThreadPoolExecutor(
+                            max_workers=workers, thread_name_prefix='password-hashing'
+                    )
+        return PasswordHasherPool._executor
+
+    @staticmethod
+    def submit(func, *args, **kwargs):
+        executor = PasswordHasherPool._pool()
+        if not PasswordHasherPool._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+
+        try:
+            future = executor.submit(func, *args, **kwargs)
+        except BaseException:
+            PasswordHasherPool._slots.release()
+            raise
+        future.add_done_callback(lambda _: PasswordHasherPool._slots.release())
+        return future
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10)
+
+    @staticmethod
+    def run(func, *args, **kwargs):
+        future = PasswordHasherPool.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=PasswordHasherPool.timeout())
+        except FutureTimeoutError:
+            # a caller that gave up is as overloaded as one that was refused;
+            # a still-queued hash is dropped, a running one frees its slot when done
+            future.cancel()
+            raise PasswordHashingBusy()
+
+    @staticmethod
+    async def arun(func, *args, **kwargs):
+        future = PasswordHasherPool.submit(func, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), PasswordHasherPool.timeout())
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise PasswordHashingBusy()
+
+    @staticmethod
+    def shutdown():
+        with PasswordHasherPool._lock:
+            if PasswordHasherPool._executor is not None:
+                PasswordHasherPool._executor.shutdown(wait=True)
+                PasswordHasherPool._executor = None
+
+    @staticmethod
+    def create_user(username, password):
+        # same steps as UserManager.create_user, with the hash computed on the pool
+        if not username:
+            raise ValueError("The given username must be set")
+
+        user = User(username=User.normalize_username(username))
+        user.password = PasswordHasherPool.run(make_password, password)
+        user.save()
+        return user
+
+class PooledPasswordBackend(ModelBackend):
+    # database access stays on the calling thread; only the hasher runs on the pool
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # hash anyway so a missing user takes as long as a wrong password
+            PasswordHasherPool.run(make_password, password)
+            return None
+
+        needs_upgrade = []
+        valid = PasswordHasherPool.run(
+                check_password, password, user.password, setter=lambda _: needs_upgrade.append(True)
+        )
+        if not valid or not self.user_can_authenticate(user):
+            return None
+
+        if needs_upgrade:
+            user.password = PasswordHasherPool.run(make_password, password)
+            user.save(update_fields=["password"])
+        return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = await User._default_manager.aget_by_natural_key(username)
+        except User.DoesNotExist:
+            await PasswordHasherPool.arun(make_password, password)
+            return None
+
+        needs_upgrade = []
+        valid = await PasswordHasherPool.arun(
+                check_password, password, user.password, setter=lambda _: needs_upgrade.append(True)
+        )
+        if not valid or not self.user_can_authenticate(user):
+            return None
+
+        if needs_upgrade:
+            user.password = await PasswordHasherPool.arun(make_password, password)
+            await user.asave(update_fields=["password"])
+        return user
@@ -0,0 +1,96 @@
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+class PermissionClaims:
+    GLOBAL_VERSION_KEY = 'jwt_authentication:permissions_version'
+    USER_VERSION_KEY = 'jwt_authentication:permissions_version:{}'
+
+    @staticmethod
+    def claimed_permissions():
+        # the bit position of each permission is its index, so only ever append
+        return getattr(settings, 'JWT_PERMISSION_CLAIMS', [])
+
+    @staticmethod
+    def version_cache():
+        return caches[getattr(settings, 'JWT_PERMISSION_VERSION_CACHE', 'default')]
+
+    @staticmethod
+    def versions_shared():
+        # a version bump in one process must reach every process checking
+        # tokens; with a per-process cache a revoked permission would be
+        # honoured until the token expires, so claims are not trusted at all
+        shared = getattr(settings, 'JWT_PERMISSION_VERSION_CACHE_SHARED', None)
+        if shared is not None:
+            return shared
+        return not isinstance(PermissionClaims.version_cache(), (LocMemCache, DummyCache))
+
+    @staticmethod
+    def encode(permission_names):
+        bits = 0
+        for index, permission_name in enumerate(PermissionClaims.claimed_permissions()):
+            if permission_name in permission_names:
+                bits |= 1 << index
+        return format(bits, 'x')
+
+    @staticmethod
+    def build_claims(user):
+        if not PermissionClaims.claimed_permissions() or not PermissionClaims.versions_shared():
+            return {}
+
+        return {
+            "perms": PermissionClaims.encode(user.get_all_permissions()),
+            "pv": PermissionClaims.current_versions(user.id),
+        }
+
+    @staticmethod
+    def has_perm(payload, permission_name):
+        # None means the token cannot answer (no claims, stale version,
+        # unclaimed permission) and the caller should ask the database
+        if not payload or "perms" not in payload or "pv" not in payload:
+            return None
+        if not PermissionClaims.versions_shared():
+            return None
+
+        claimed_permissions = PermissionClaims.claimed_permissions()
+        if permission_name not in claimed_permissions:
+            return None
+
+        if payload["pv"] != PermissionClaims.stored_versions(payload["sub"]):
+            return None
+
+        try:
+            bits = int(payload["perms"], 16)
+        except (TypeError, ValueError):
+            return None
+
+        return bool(bits >> claimed_permissions.index(permission_name) & 1)
+
+    @staticmethod
+    def current_versions(user_id):
+        keys = [PermissionClaims.GLOBAL_VERSION_KEY, PermissionClaims.USER_VERSION_KEY.format(user_id)]
+        for key in keys:
+            # seeded from the clock so a flushed cache never revives old versions
+            PermissionClaims.version_cache().add(key, time.time_ns(), timeout=None)
+        return PermissionClaims.stored_versions(user_id)
+
+    @staticmethod
+    def stored_versions(user_id):
+        keys = [PermissionClaims.GLOBAL_VERSION_KEY, PermissionClaims.USER_VERSION_KEY.format(user_id)]
+        versions = PermissionClaims.version_cache().get_many(keys)
+        return [versions.get(key) for key in keys]
+
+    @staticmethod
+    def bump_version(user_id=None):
+        if user_id is None:
+            key = PermissionClaims.GLOBAL_VERSION_KEY
+        else:
+            key = PermissionClaims.USER_VERSION_KEY.format(user_id)
+
+        try:
+            PermissionClaims.version_cache().incr(key)
+        except ValueError:
+            # nothing issued against this key yet
+            pass
@@ -0,0 +1,158 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from .models import RevokedToken
+
+class BloomFilter:
+    def __init__(self, size, hashes):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    @staticmethod
+    def for_capacity(capacity, error_rate):
+        size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(size / capacity * math.log(2)))
+        return BloomFilter(size, hashes)
+
+    def positions(self, value):
+        # double hashing: k positions from one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+class TokenRevocationList:
+    # the filter only answers "definitely not revoked" or "maybe"; storage is
+    # consulted on a maybe. Revocations made by other processes are picked up
+    # on the next rebuild, at most JWT_REVOCATION_REBUILD_INTERVAL seconds later
+    _filter = None
+    _built_at = 0.0
+    _pending = []
+    _lock = threading.Lock()
+    _rebuild_lock = threading.Lock()
+    lookups = 0
+    storage_checks = 0
+    false_positives = 0
+
+    @staticmethod
+    def _new_filter():
+        return BloomFilter.for_capacity(
+                getattr(settings, 'JWT_REVOCATION_BLOOM_CAPACITY', 100_000),
+                getattr(settings, 'JWT_REVOCATION_BLOOM_ERROR_RATE', 0.001),
+        )
+
+    @staticmethod
+    def _stale():
+        interval = getattr(settings, 'JWT_REVOCATION_REBUILD_INTERVAL', 60)
+        return TokenRevocationList._filter is None or time.monotonic() - TokenRevocationList._built_at >= interval
+
+    @staticmethod
+    def purge_expired():
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    @staticmethod
+    def rebuild():
+        # one rebuild at a time; everyone else keeps using the previous filter
+        blocking = TokenRevocationList._filter is None
+        if not TokenRevocationList._rebuild_lock.acquire(blocking=blocking):
+            return
+        try:
+            TokenRevocationList.purge_expired()
+            bloom = TokenRevocationList._new_filter()
+            live = RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True)
+            for jti in live.iterator():
+                bloom.add(jti)
+
+            with TokenRevocationList._lock:
+                # revocations that raced with the load above
+                for jti in TokenRevocationList._pending:
+                    bloom.add(jti)
+                TokenRevocationList._pending = []
+                TokenRevocationList._filter = bloom
+                TokenRevocationList._built_at = time.monotonic()
+        finally:
+            TokenRevocationList._rebuild_lock.release()
+
+    @staticmethod
+    def revoke(jti, expires_at):
+        if isinstance(expires_at, (int, float)):
+            expires_at = datetime.fromtimestamp(expires_at, tz=dt_timezone.utc)
+        RevokedToken.objects.get_or_create(jti=jti, defaults={"expires_at": expires_at})
+
+        with TokenRevocationList._lock:
+            TokenRevocationList._pending.append(jti)
+            if TokenRevocationList._filter is not None:
+                TokenRevocationList._filter.add(jti)
+
+    @staticmethod
+    def _maybe_revoked(jti):
+        with TokenRevocationList._lock:
+            TokenRevocationList.lookups += 1
+            if jti not in TokenRevocationList._filter:
+                return False
+            TokenRevocationList.storage_checks += 1
+            return True
+
+    @staticmethod
+    def _record(revoked):
+        if not revoked:
+            with TokenRevocationList._lock:
+                TokenRevocationList.false_positives += 1
+        return revoked
+
+    @staticmethod
+    def is_revoked(jti):
+        # tokens issued without a jti cannot be revoked
+        if not jti:
+            return False
+        if TokenRevocationList._stale():
+            TokenRevocationList.rebuild()
+        if not TokenRevocationList._maybe_revoked(jti):
+            return False
+
+        revoked = RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+        return TokenRevocationList._record(revoked)
+
+    @staticmethod
+    async def ais_revoked(jti):
+        if not jti:
+            return False
+        if TokenRevocationList._stale():
+            await sync_to_async(TokenRevocationList.rebuild)()
+        if not TokenRevocationList._maybe_revoked(jti):
+            return False
+
+        revoked = await RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).aexists()
+        return TokenRevocationList._record(revoked)
+
+    @staticmethod
+    def reset():
+        with TokenRevocationList._lock:
+            TokenRevocationList._filter = None
+            TokenRevocationList._pending = []
+
+    @staticmethod
+    def stats():
+        with TokenRevocationList._lock:
+            bloom = TokenRevocationList._filter
+            return {
+                "lookups": TokenRevocationList.lookups,
+                "storage_checks": TokenRevocationList.storage_checks,
+                "false_positives": TokenRevocationList.false_positives,
+                "filter_bits": bloom.size if bloom else 0,
+                "filter_hashes": bloom.hashes if bloom else 0,
+            }
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .permissions import PermissionClaims
+from .users import UserCache
+
+User = get_user_model()
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    UserCache.invalidate(instance.pk)
+    PermissionClaims.bump_version(instance.pk)
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_cached_users_on_group_change(sender, instance, **kwargs):
+    UserCache.clear()
+    if kwargs.get('created') is not True:
+        PermissionClaims.bump_version()
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_cached_user_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        UserCache.invalidate(instance.pk)
+    elif pk_set is None:
+        UserCache.clear()
+    else:
+        for user_id in pk_set:
+            UserCache.invalidate(user_id)
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_permission_claims_on_user_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        PermissionClaims.bump_version(instance.pk)
+    elif pk_set is None:
+        PermissionClaims.bump_version()
+    else:
+        for user_id in pk_set:
+            PermissionClaims.bump_version(user_id)
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_permission_claims_on_group_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        PermissionClaims.bump_version()
@@ -1,10 +1,26 @@
 import json
+from datetime import timedelta
+import threading
+import time
+from unittest import mock
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.urls import reverse
-from django.contrib.auth import get_user_model
+from django.contrib.auth import aauthenticate, get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import Group, Permission
 from django.conf import settings
+from django.http import JsonResponse
+from django.utils import timezone
 
+from appointments_api.seeders import PermissionSeeder
+from .decorators import permission_required
+from .middleware import JWTAuthenticationMiddleware
+from .passwords import PasswordHasherPool
+from .models import RevokedToken
+from .permissions import PermissionClaims
+from .revocation import BloomFilter, TokenRevocationList
+from .users import UserCache
 from .utils import JWTUtils
 
 User = get_user_model()
@@ -53,3 +69,321 @@ class JWTAuthTests(TestCase):
         self.assertEqual(response.status_code, 401)
         self.assertNotIn("access_token", response.json())
         self.assertEqual(response.json()["error"], "Credential Invalid")
+
+class JWTUserCacheTests(TestCase):
+    def setUp(self):
+        UserCache.clear()
+        self.factory = RequestFactory()
+        self.middleware = JWTAuthenticationMiddleware(lambda request: None)
+
+    def authenticate(self, user):
+        request = self.factory.get("/", headers={"Authorization": f"Bearer {JWTUtils.generate_tokens(user)}"})
+        self.middleware.process_request(request)
+        return request
+
+    def test_repeated_requests_hit_cache(self):
+        existing_user = User.objects.create_user(username='test1')
+        self.authenticate(existing_user)
+        hits = UserCache.stats()["hits"]
+
+        with self.assertNumQueries(0):
+            request = self.authenticate(existing_user)
+
+        self.assertEqual(request.user.id, existing_user.id)
+        self.assertEqual(UserCache.stats()["hits"], hits + 1)
+
+    def test_cached_user_includes_groups(self):
+        group = Group.objects.create(name='PATIENT')
+        existing_user = User.objects.create_user(username='test1')
+        existing_user.groups.add(group)
+        self.authenticate(existing_user)
+
+        with self.assertNumQueries(0):
+            groups = list(self.authenticate(existing_user).user.groups.all())
+
+        self.assertEqual(groups, [group])
+
+    def test_user_save_invalidates_cache(self):
+        existing_user = User.objects.create_user(username='test1')
+        self.authenticate(existing_user)
+
+        existing_user.username = 'test1_updated'
+        existing_user.save()
+
+        self.assertEqual(self.authenticate(existing_user).user.username, 'test1_updated')
+
+    def test_group_change_invalidates_cache(self):
+        group = Group.objects.create(name='PATIENT')
+        existing_user = User.objects.create_user(username='test1')
+        self.authenticate(existing_user)
+
+        group.user_set.add(existing_user)
+
+        self.assertEqual(list(self.authenticate(existing_user).user.groups.all()), [group])
+
+    def test_user_delete_invalidates_cache(self):
+        existing_user = User.objects.create_user(username='test1')
+        token = JWTUtils.generate_tokens(existing_user)
+        self.authenticate(existing_user)
+
+        existing_user.delete()
+        request = self.factory.get("/", headers={"Authorization": f"Bearer {token}"})
+        self.middleware.process_request(request)
+
+        self.assertTrue(request.user.is_anonymous)
+
+    def test_request_mutations_do_not_leak_into_cache(self):
+        existing_user = User.objects.create_user(username='test1')
+        self.authenticate(existing_user).user.username = 'mutated'
+
+        self.assertEqual(self.authenticate(existing_user).user.username, 'test1')
+
+@permission_required('appointments_api.view_service')
+def view_service_probe(request):
+    return JsonResponse({"status": "success"})
+
+# one test process, so its locmem cache is shared by everything it runs
+@override_settings(JWT_PERMISSION_VERSION_CACHE_SHARED=True)
+class JWTPermissionClaimsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed_data = PermissionSeeder.seed_all()
+        cls.admin_group, cls.doctor_group, cls.patient_group = cls.seed_data["groups"]
+
+    def setUp(self):
+        UserCache.clear()
+        self.factory = RequestFactory()
+        self.middleware = JWTAuthenticationMiddleware(view_service_probe)
+
+    def call(self, token):
+        request = self.factory.get("/", headers={"Authorization": f"Bearer {token}"})
+        return self.middleware(request)
+
+    def test_token_embeds_permission_bitset(self):
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(JWTPermissionClaimsTests.patient_group)
+
+        payload = JWTUtils.validate_token(JWTUtils.generate_tokens(patient))
+
+        self.assertEqual(
+                PermissionClaims.encode(patient.get_all_permissions()), payload["perms"]
+        )
+        self.assertTrue(PermissionClaims.has_perm(payload, 'appointments_api.view_service'))
+        self.assertFalse(PermissionClaims.has_perm(payload, 'appointments_api.add_service'))
+        self.assertIsNone(PermissionClaims.has_perm(payload, 'auth.add_user'))
+
+    def test_permission_required_uses_claims_without_auth_queries(self):
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(JWTPermissionClaimsTests.patient_group)
+        token = JWTUtils.generate_tokens(patient)
+        self.call(token)
+
+        with self.assertNumQueries(0):
+            response = self.call(token)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_group_permission_change_makes_claims_stale(self):
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(JWTPermissionClaimsTests.patient_group)
+        token = JWTUtils.generate_tokens(patient)
+        payload = JWTUtils.validate_token(token)
+
+        view_service = Permission.objects.get(codename='view_service')
+        JWTPermissionClaimsTests.patient_group.permissions.remove(view_service)
+
+        self.assertIsNone(PermissionClaims.has_perm(payload, 'appointments_api.view_service'))
+        self.assertEqual(self.call(token).status_code, 403)
+
+    def test_user_group_change_makes_only_that_users_claims_stale(self):
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(JWTPermissionClaimsTests.patient_group)
+        other = User.objects.create_user(username='patient2')
+        other.groups.add(JWTPermissionClaimsTests.patient_group)
+        payload = JWTUtils.validate_token(JWTUtils.generate_tokens(patient))
+        other_payload = JWTUtils.validate_token(JWTUtils.generate_tokens(other))
+
+        patient.groups.remove(JWTPermissionClaimsTests.patient_group)
+
+        self.assertIsNone(PermissionClaims.has_perm(payload, 'appointments_api.view_service'))
+        self.assertTrue(PermissionClaims.has_perm(other_payload, 'appointments_api.view_service'))
+
+    @override_settings(JWT_PERMISSION_VERSION_CACHE_SHARED=None)
+    def test_process_local_version_cache_disables_claims(self):
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(JWTPermissionClaimsTests.patient_group)
+        with override_settings(JWT_PERMISSION_VERSION_CACHE_SHARED=True):
+            payload = JWTUtils.validate_token(JWTUtils.generate_tokens(patient))
+
+        # a bump in another worker would never reach this locmem cache
+        self.assertFalse(PermissionClaims.versions_shared())
+        self.assertIsNone(PermissionClaims.has_perm(payload, 'appointments_api.view_service'))
+        self.assertNotIn("perms", JWTUtils.validate_token(JWTUtils.generate_tokens(patient)))
+
+class JWTTokenCacheTests(TestCase):
+    def setUp(self):
+        JWTUtils.clear_token_cache()
+
+    def test_repeated_validation_skips_decode(self):
+        existing_user = User.objects.create_user(username='test1')
+        token = JWTUtils.generate_tokens(existing_user)
+        JWTUtils.validate_token(token)
+
+        with mock.patch("jwt_authentication.utils.jwt.decode") as decode:
+            payload = JWTUtils.validate_token(token)
+
+        decode.assert_not_called()
+        self.assertEqual(int(payload["sub"]), existing_user.id)
+
+    def test_unseen_token_is_verified(self):
+        existing_user = User.objects.create_user(username='test1')
+        token = JWTUtils.generate_tokens(existing_user)
+        JWTUtils.validate_token(token)
+
+        header, payload, signature = token.split(".")
+        tampered = f"{header}.{payload}.{signature[:-4]}AAAA"
+
+        self.assertIsNone(JWTUtils.validate_token(tampered))
+
+    def test_cache_entry_never_outlives_token(self):
+        existing_user = User.objects.create_user(username='test1')
+        with override_settings(JWT_ACCESS_TOKEN_LIFETIME=1):
+            token = JWTUtils.generate_tokens(existing_user)
+        JWTUtils.validate_token(token)
+
+        _, expires_at = next(iter(JWTUtils._validated_tokens._entries.values()))
+        self.assertLessEqual(expires_at - time.monotonic(), 60)
+
+    def test_secret_rotation_bypasses_cache(self):
+        existing_user = User.objects.create_user(username='test1')
+        token = JWTUtils.generate_tokens(existing_user)
+        JWTUtils.validate_token(token)
+
+        with override_settings(SECRET_KEY="rotated"):
+            self.assertIsNone(JWTUtils.validate_token(token))
+
+class PasswordHasherPoolTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        PasswordHasherPool.shutdown()
+        self.addCleanup(PasswordHasherPool.shutdown)
+
+    def test_hashing_runs_on_dedicated_threads(self):
+        thread_name = PasswordHasherPool.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(thread_name.startswith("password-hashing"))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_MAX_PENDING=0)
+    def test_login_rejected_when_pool_saturated(self):
+        User.objects.create_user(username='test1', password='password')
+        release = threading.Event()
+        PasswordHasherPool.submit(release.wait)
+
+        data = {"username": "test1", "password": "password"}
+        response = self.client.post(reverse("login"), json.dumps(data), content_type="application/json")
+        release.set()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertEqual(response.json()["status"], "unavailable")
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_TIMEOUT=0.05)
+    def test_login_past_timeout_is_busy_not_an_error(self):
+        User.objects.create_user(username='test1', password='password')
+        release = threading.Event()
+        PasswordHasherPool.submit(release.wait)
+
+        data = {"username": "test1", "password": "password"}
+        response = self.client.post(reverse("login"), json.dumps(data), content_type="application/json")
+        release.set()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "unavailable")
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        existing_user = User.objects.create_user(username='test1')
+        existing_user.password = PBKDF2PasswordHasher().encode("password", "legacysalt", iterations=1000)
+        existing_user.save()
+
+        data = {"username": "test1", "password": "password"}
+        response = self.client.post(reverse("login"), json.dumps(data), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        existing_user.refresh_from_db()
+        self.assertTrue(existing_user.password.startswith(f"pbkdf2_sha256${PBKDF2PasswordHasher.iterations}$"))
+
+    async def test_async_authentication(self):
+        user = await aauthenticate(username='missing', password='password')
+        self.assertIsNone(user)
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        TokenRevocationList.reset()
+        self.addCleanup(TokenRevocationList.reset)
+        self.user = User.objects.create_user(username='test1')
+        self.token = JWTUtils.generate_tokens(self.user)
+
+    def services(self, token):
+        return self.client.get(reverse("show_all_services"), headers={"Authorization": f"Bearer {token}"})
+
+    def test_logout_revokes_only_that_token(self):
+        self.user.groups.add(PermissionSeeder.seed_all()["groups"][2])
+        other_token = JWTUtils.generate_tokens(User.objects.get(id=self.user.id))
+
+        response = self.client.post(reverse("logout"), headers={"Authorization": f"Bearer {self.token}"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.services(self.token).status_code, 401)
+        self.assertEqual(self.services(other_token).status_code, 200)
+
+    def test_logout_without_bearer_token_is_rejected(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse("logout"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Token Not Revocable")
+
+    def test_filter_miss_skips_storage(self):
+        TokenRevocationList.rebuild()
+        payload = JWTUtils.validate_token(self.token)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(TokenRevocationList.is_revoked(payload["jti"]))
+
+    def test_revocations_from_other_processes_load_on_rebuild(self):
+        TokenRevocationList.rebuild()
+        payload = JWTUtils.validate_token(self.token)
+        RevokedToken.objects.create(jti=payload["jti"], expires_at=timezone.now() + timedelta(minutes=5))
+
+        self.assertFalse(TokenRevocationList.is_revoked(payload["jti"]))
+        with override_settings(JWT_REVOCATION_REBUILD_INTERVAL=0):
+            self.assertTrue(TokenRevocationList.is_revoked(payload["jti"]))
+
+    def test_rebuild_purges_expired_entries(self):
+        RevokedToken.objects.create(jti="expired", expires_at=timezone.now() - timedelta(seconds=1))
+        RevokedToken.objects.create(jti="live", expires_at=timezone.now() + timedelta(minutes=5))
+
+        TokenRevocationList.rebuild()
+
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["live"])
+        self.assertFalse(TokenRevocationList.is_revoked("expired"))
+        self.assertTrue(TokenRevocationList.is_revoked("live"))
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        values = [f"jti-{i}" for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    async def test_async_lookup(self):
+        await RevokedToken.objects.acreate(jti="revoked", expires_at=timezone.now() + timedelta(minutes=5))
+
+        self.assertTrue(await TokenRevocationList.ais_revoked("revoked"))
+        self.assertFalse(await TokenRevocationList.ais_revoked("unknown"))
@@ -2,5 +2,6 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    path("login", views.login, name="login")
+    path("login", views.login, name="login"),
+    path("logout", views.logout, name="logout"),
 ]
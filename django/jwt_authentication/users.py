@@ -0,0 +1,56 @@
+import copy
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from .cache import TTLCache
+
+User = get_user_model()
+
+class UserCache:
+    _cache = TTLCache(
+            max_size=getattr(settings, 'JWT_USER_CACHE_SIZE', 1024),
+            ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 60),
+    )
+
+    @staticmethod
+    def get_user(user_id):
+        key = str(user_id)
+        user = UserCache._cache.get(key)
+        if user is None:
+            user = User.objects.prefetch_related('groups').get(id=user_id)
+            UserCache._cache.set(key, user)
+        return UserCache._copy(user)
+
+    @staticmethod
+    async def aget_user(user_id):
+        key = str(user_id)
+        user = UserCache._cache.get(key)
+        if user is None:
+            user = await User.objects.prefetch_related('groups').aget(id=user_id)
+            UserCache._cache.set(key, user)
+        return UserCache._copy(user)
+
+    @staticmethod
+    def _copy(user):
+        # hand out a copy so per-request mutations (and permission caches
+        # filled by has_perm) never leak into the shared entry
+        user_copy = copy.copy(user)
+        if hasattr(user, '_prefetched_objects_cache'):
+            user_copy._prefetched_objects_cache = user._prefetched_objects_cache.copy()
+        return user_copy
+
+    @staticmethod
+    def invalidate(user_id):
+        key = str(user_id)
+        UserCache._cache.delete(key)
+        # a concurrent request may reload the old row before the writer commits
+        transaction.on_commit(lambda: UserCache._cache.delete(key))
+
+    @staticmethod
+    def clear():
+        UserCache._cache.clear()
+        transaction.on_commit(UserCache._cache.clear)
+
+    @staticmethod
+    def stats():
+        return UserCache._cache.stats()
@@ -1,35 +1,63 @@
 import jwt
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta
 from django.conf import settings
+from .cache import TTLCache
+from .permissions import PermissionClaims
 
 class JWTUtils:
+    _validated_tokens = TTLCache(
+            max_size=getattr(settings, 'JWT_TOKEN_CACHE_SIZE', 4096),
+            ttl=getattr(settings, 'JWT_TOKEN_CACHE_TTL', 300),
+    )
+
     @staticmethod
     def generate_tokens(sub_obj):
         payload = {
                 "sub": str(sub_obj.id),
                 "iat": datetime.utcnow(),
                 "exp": datetime.utcnow() + timedelta(minutes=getattr(settings, 'JWT_ACCESS_TOKEN_LIFETIME', 30)),
+                "jti": uuid.uuid4().hex,
         }
 
         additional_payload = {}
         for sub_attr in getattr(settings, 'JWT_SUBJECT_ATTRIBUTES_AS_ADDITIONAL_CLAIMS', []):
             additional_payload = additional_payload | {sub_attr: getattr(sub_obj, sub_attr, None)}
 
-        payload = payload | additional_payload
+        payload = payload | additional_payload | PermissionClaims.build_claims(sub_obj)
         access_token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
 
         return access_token
 
     @staticmethod
     def validate_token(token):
+        # keyed by the secret too, so rotating SECRET_KEY drops old entries
+        digest = hashlib.sha256(f"{settings.SECRET_KEY}:{token}".encode()).digest()
+        payload = JWTUtils._validated_tokens.get(digest)
+        if payload is not None:
+            return dict(payload)
+
         try:
             payload = jwt.decode(
                     token,
                     settings.SECRET_KEY,
                     algorithms=['HS256']
             )
-            return payload
+            # never serve a cached payload past the token's own expiry
+            ttl = payload["exp"] - time.time() if "exp" in payload else None
+            JWTUtils._validated_tokens.set(digest, payload, ttl=ttl)
+            return dict(payload)
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
             return None
+
+    @staticmethod
+    def token_cache_stats():
+        return JWTUtils._validated_tokens.stats()
+
+    @staticmethod
+    def clear_token_cache():
+        JWTUtils._validated_tokens.clear()
@@ -5,8 +5,20 @@ from django.views.decorators.http import require_http_methods
 from django.contrib.auth import authenticate, get_user_model
 from django.conf import settings
 from django.http import JsonResponse
+from .decorators import jwt_required
+from .passwords import PasswordHashingBusy
+from .revocation import TokenRevocationList
 from .utils import JWTUtils
 
+def password_hashing_busy_response():
+    response = JsonResponse({
+        "error": "Service Unavailable",
+        "message": "too many concurrent password operations, retry shortly",
+        "status": "unavailable"
+    }, status=503)
+    response.headers["Retry-After"] = "1"
+    return response
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def login(request):
@@ -25,9 +37,27 @@ def login(request):
                 "message": "invalid email or password",
                 "status": "unauthorized"
             }, status=401)
+    except PasswordHashingBusy:
+        return password_hashing_busy_response()
     except json.JSONDecodeError:
         return JsonResponse({
             "error": "Invalid JSON",
             "message": "Invalid request body: Expecting valid JSON",
             "status": "bad-request"
         }, status=400)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@jwt_required
+def logout(request):
+    # session-authenticated requests carry no bearer token to revoke
+    payload = getattr(request, "jwt_payload", None)
+    if not payload or not payload.get("jti"):
+        return JsonResponse({
+            "error": "Token Not Revocable",
+            "message": "request has no bearer token with a jti claim",
+            "status": "bad-request"
+        }, status=400)
+
+    TokenRevocationList.revoke(payload["jti"], payload["exp"])
+    return JsonResponse({"status": "revoked"})
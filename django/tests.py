@@ -1,5 +1,35 @@
-from django.test import TestCase, Client
+import json
+import os
+import pstats
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.test import TestCase, SimpleTestCase, AsyncClient, Client, RequestFactory, override_settings
 from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import router, transaction
+from django.db.utils import ConnectionHandler, OperationalError
+from django.http import HttpResponse
+
+from appointments_api.models import Service, Appointment
+from appointments_api.seeders import PermissionSeeder
+from jwt_authentication.utils import JWTUtils
+from health_linkr.database import (
+    copy_sqlite_database, database_self_check, sqlite_production_settings, sqlite_replica_settings,
+)
+from health_linkr.middleware import _capture_lock, ProfilingMiddleware, QueryTimingMiddleware, ReplicaRoutingMiddleware
+from health_linkr.routers import replica_reads
+from health_linkr.tasks import TaskExecutor, TaskQueueFull
+
+User = get_user_model()
 
 class APITest(TestCase):
 
@@ -15,3 +45,373 @@ class APITest(TestCase):
         self.assertEqual(response.status_code, 200)
 
         self.assertEqual(response.json(), {"ping": "pong"})
+
+class QueryTimingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_timing_headers_absent_by_default(self):
+        response = self.client.get(reverse('ping'))
+
+        self.assertNotIn("Server-Timing", response.headers)
+
+    @override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_QUERY_COUNT=3)
+    def test_timing_headers_and_slow_log(self):
+        """
+        Tests that query count and timings are reported and that an N+1 request is logged with its SQL.
+        """
+        _, doctor_group, patient_group = PermissionSeeder.seed_all()["groups"]
+        patient = User.objects.create_user(username='patient1')
+        patient.groups.add(patient_group)
+        for i in range(3):
+            doctor = User.objects.create_user(username=f'doctor{i}')
+            service = Service.objects.create(name=f"service{i}", address="New Jersey", doctor=doctor)
+            Appointment.objects.create(scheduled_at=1_800_000_000 + i, service=service, doctor=doctor, patient=patient)
+
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+        with self.assertLogs("health_linkr.timing", level="WARNING") as logs:
+            response = Client().get(reverse('show_all_appointments'), headers=headers)
+
+        metrics = {
+            metric.split(";")[0]: metric for metric in response.headers["Server-Timing"].split(", ")
+        }
+        self.assertEqual(set(metrics), {"total", "mw", "view", "db"})
+        self.assertRegex(metrics["db"], r'desc="\d+ queries"')
+        self.assertIn("SELECT", logs.output[0])
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    async def test_async_views_count_their_queries(self):
+        patient = await User.objects.acreate(username='patient1')
+        headers = { "Authorization": f"Bearer {JWTUtils.generate_tokens(patient)}" }
+
+        response = await AsyncClient().get(reverse('async_show_all_services'), headers=headers)
+
+        db = next(metric for metric in response.headers["Server-Timing"].split(", ") if metric.startswith("db;"))
+        self.assertGreater(int(db.split('desc="')[1].split()[0]), 0)
+
+class DatabaseProfileTest(SimpleTestCase):
+
+    def open_database(self, directory, **settings_dict):
+        handler = ConnectionHandler({"default": {}, "profile": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(Path(directory) / "db.sqlite3"),
+            **settings_dict,
+        }})
+        self.addCleanup(handler.close_all)
+        return handler["profile"]
+
+    @override_settings(DATABASE_PROFILE="production")
+    def test_production_profile_applies_pragmas(self):
+        """
+        Tests that the production profile's connection-init pragmas are in effect on a file database.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection = self.open_database(directory, **sqlite_production_settings(conn_max_age=60))
+            with self.assertLogs("health_linkr.database", level="INFO"):
+                report = database_self_check(connection)
+
+            self.assertEqual(report["pragmas"]["journal_mode"], "wal")
+            self.assertEqual(report["pragmas"]["synchronous"], 1)
+            self.assertEqual(report["pragmas"]["busy_timeout"], 5000)
+            self.assertEqual(report["conn_max_age"], 60)
+            self.assertEqual(report["transaction_mode"], "IMMEDIATE")
+            self.assertEqual(report["mismatches"], {})
+
+    @override_settings(DATABASE_PROFILE="production")
+    def test_self_check_reports_mismatches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            connection = self.open_database(directory)
+            with self.assertLogs("health_linkr.database", level="WARNING") as logs:
+                report = database_self_check(connection)
+
+        self.assertIn("journal_mode", report["mismatches"])
+        self.assertTrue(any("journal_mode" in line for line in logs.output))
+
+    @override_settings(DATABASE_PROFILE="production")
+    def test_self_check_tolerates_pragmas_without_rows(self):
+        handler = ConnectionHandler({"default": {}, "memory": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}})
+        self.addCleanup(handler.close_all)
+
+        with self.assertLogs("health_linkr.database", level="WARNING"):
+            report = database_self_check(handler["memory"])
+
+        self.assertIsNone(report["pragmas"]["mmap_size"])
+        self.assertEqual(report["mismatches"]["mmap_size"]["actual"], None)
+
+@override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_PIN_CACHE_SHARED=True)
+class ReplicaRoutingTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(2)]
+
+        def view(request):
+            return HttpResponse(router.db_for_read(Service))
+        self.middleware = ReplicaRoutingMiddleware(view)
+
+    def read_alias(self, method, user):
+        request = getattr(self.factory, method)("/api/services/")
+        request.user = user
+        return self.middleware(request).content.decode()
+
+    def test_reads_use_primary_outside_requests(self):
+        self.assertEqual(router.db_for_read(Service), "default")
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Service), "replica1")
+            self.assertEqual(router.db_for_write(Service), "default")
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.read_alias("get", self.users[0]), "replica1")
+        self.assertEqual(self.read_alias("post", self.users[0]), "default")
+
+    @override_settings(DATABASE_REPLICA_STICKY_SECONDS=60)
+    def test_writer_is_pinned_to_primary(self):
+        """
+        Tests that a client reads its own writes while other clients keep using the replica.
+        """
+        self.read_alias("put", self.users[0])
+
+        self.assertEqual(self.read_alias("get", self.users[0]), "default")
+        self.assertEqual(self.read_alias("get", self.users[1]), "replica1")
+
+    @override_settings(DATABASE_REPLICA_PIN_CACHE_SHARED=None)
+    def test_process_local_pin_cache_disables_replica_reads(self):
+        with self.assertLogs("health_linkr.database", level="WARNING"):
+            with self.assertRaises(MiddlewareNotUsed):
+                ReplicaRoutingMiddleware(lambda request: HttpResponse())
+
+class SqliteReplicaTest(SimpleTestCase):
+
+    def test_copy_job_refreshes_open_replica(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary = str(Path(directory) / "primary.sqlite3")
+            replica = str(Path(directory) / "replica.sqlite3")
+            handler = ConnectionHandler({"default": {}, "replica": sqlite_replica_settings(
+                {"ENGINE": "django.db.backends.sqlite3", "NAME": primary}, replica
+            )})
+            self.addCleanup(handler.close_all)
+
+            with sqlite3.connect(primary) as connection:
+                connection.execute("CREATE TABLE service (name TEXT)")
+                connection.execute("INSERT INTO service VALUES ('service1')")
+            copy_sqlite_database(primary, replica)
+
+            with handler["replica"].cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM service")
+                self.assertEqual(cursor.fetchone()[0], 1)
+                with self.assertRaises(OperationalError):
+                    cursor.execute("INSERT INTO service VALUES ('service2')")
+
+            with sqlite3.connect(primary) as connection:
+                connection.execute("INSERT INTO service VALUES ('service2')")
+            copy_sqlite_database(primary, replica)
+
+            with handler["replica"].cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM service")
+                self.assertEqual(cursor.fetchone()[0], 2)
+
+class TaskExecutorTest(TestCase):
+
+    def executor(self, **options):
+        executor = TaskExecutor("test", **options)
+        self.addCleanup(executor.shutdown, 5)
+        return executor
+
+    def test_tasks_run_after_commit_only(self):
+        executor = self.executor(workers=2)
+        results = []
+
+        with self.captureOnCommitCallbacks(execute=True):
+            executor.submit_on_commit(results.append, "committed")
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    executor.submit_on_commit(results.append, "rolled back")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertTrue(executor.drain(5))
+        self.assertEqual(results, ["committed"])
+        self.assertEqual(executor.stats()["completed"], 1)
+
+    def test_full_queue_rejects_instead_of_blocking(self):
+        executor = self.executor(workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        executor.submit(lambda: (started.set(), release.wait()))
+        started.wait(5)
+        executor.submit(lambda: None)
+        with self.assertRaises(TaskQueueFull):
+            executor.submit(lambda: None)
+
+        stats = executor.stats()
+        release.set()
+        self.assertEqual((stats["queue_depth"], stats["running"], stats["rejected"]), (1, 1, 1))
+        self.assertTrue(executor.drain(5))
+
+    def test_failed_tasks_retry_with_backoff(self):
+        executor = self.executor(workers=1, max_retries=2, backoff=0.01)
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("temporarily unavailable")
+
+        with self.assertLogs("health_linkr.tasks", level="WARNING"):
+            executor.submit(flaky)
+            self.assertTrue(executor.drain(5))
+
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(executor.stats()["retried"], 2)
+        self.assertEqual(executor.stats()["completed"], 1)
+
+    def test_task_fails_after_max_retries(self):
+        executor = self.executor(workers=1, max_retries=1, backoff=0.01)
+
+        with self.assertLogs("health_linkr.tasks", level="ERROR"):
+            executor.submit(lambda: 1 / 0)
+            self.assertTrue(executor.drain(5))
+
+        self.assertEqual(executor.stats()["failed"], 1)
+
+    def test_shutdown_drains_queue(self):
+        executor = TaskExecutor("test", workers=1)
+        results = []
+        for i in range(5):
+            executor.submit(results.append, i)
+
+        self.assertTrue(executor.shutdown(timeout=5))
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+        with self.assertRaises(TaskQueueFull):
+            executor.submit(results.append, 5)
+
+class ProfilingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.settings_override = override_settings(
+            REQUEST_PROFILING_ENABLED=True, REQUEST_PROFILING_TOKEN="secret",
+            REQUEST_PROFILING_DIR=self.directory, REQUEST_PROFILING_MAX_PROFILES=2,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client = Client()
+
+    def ping(self, token=None):
+        headers = {"X-Profile-Request": token} if token else {}
+        with self.assertNoLogs("health_linkr.profiling", level="WARNING"):
+            return self.client.get(reverse('ping'), headers=headers)
+
+    def test_authorized_header_stores_profile(self):
+        """
+        Tests that a profiled request returns its id and leaves a pstats dump plus collapsed stacks.
+        """
+        with self.assertLogs("health_linkr.profiling", level="INFO"):
+            response = self.client.get(reverse('ping'), headers={"X-Profile-Request": "secret"})
+
+        profile_id = response.headers["X-Profile-Id"]
+        stats = pstats.Stats(str(self.directory / f"{profile_id}.pstats"))
+        self.assertTrue(any(name == "ping" for _, _, name in stats.stats))
+
+        lines = (self.directory / f"{profile_id}.collapsed").read_text().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        self.assertTrue(any(line.startswith("profiled_request") and "_get_response (base.py:" in line for line in lines))
+
+    def test_wrong_token_is_not_profiled(self):
+        response = self.ping("guess")
+
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0)
+    def test_sampled_requests_rotate(self):
+        with self.assertLogs("health_linkr.profiling", level="INFO"):
+            ids = [self.client.get(reverse('ping')).headers["X-Profile-Id"] for _ in range(3)]
+
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(len(list(self.directory.glob("*.pstats"))), 2)
+        self.assertEqual(len(list(self.directory.glob("*.collapsed"))), 2)
+
+    def test_concurrent_capture_is_skipped(self):
+        with _capture_lock:
+            response = self.ping("secret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertFalse(_capture_lock.locked())
+
+    def test_other_active_profiler_is_skipped(self):
+        with mock.patch("cProfile.Profile.enable", side_effect=ValueError("Another profiling tool is already active")):
+            response = self.ping("secret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertFalse(_capture_lock.locked())
+
+    def test_rotate_skips_files_removed_concurrently(self):
+        for name in ("a", "b", "c"):
+            (self.directory / f"{name}.pstats").write_text("")
+        original_stat = Path.stat
+
+        def stat(path, *args, **kwargs):
+            if path.name == "b.pstats":
+                raise FileNotFoundError(path)
+            return original_stat(path, *args, **kwargs)
+
+        with mock.patch.object(Path, "stat", stat):
+            ProfilingMiddleware(lambda request: None).rotate()
+
+        self.assertEqual(len(list(self.directory.glob("*.pstats"))), 3)
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    async def test_async_views_keep_an_async_chain(self):
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(QueryTimingMiddleware(view)))
+        self.assertTrue(iscoroutinefunction(ProfilingMiddleware(view)))
+
+        with self.assertLogs("health_linkr.profiling", level="INFO"):
+            response = await AsyncClient().get(reverse('async_show_all_services'), headers={"X-Profile-Request": "secret"})
+
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("X-Profile-Id", response.headers)
+        self.assertIn("db;dur=", response.headers["Server-Timing"])
+        self.assertTrue((self.directory / f'{response.headers["X-Profile-Id"]}.pstats').exists())
+
+class ApiOnlyProfileTest(SimpleTestCase):
+
+    def test_api_profile_serves_jwt_endpoints(self):
+        """
+        Tests that the API-only profile boots without admin, sessions or messages and still rejects anonymous calls.
+        """
+        script = (
+            "import django, json; django.setup()\n"
+            "from django.conf import settings\n"
+            "from django.test import Client\n"
+            "from django.test.utils import setup_test_environment\n"
+            "setup_test_environment()\n"
+            "response = Client().get('/api/services/')\n"
+            "print(json.dumps([settings.INSTALLED_APPS, settings.MIDDLEWARE, response.status_code]))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=Path(__file__).resolve().parent, capture_output=True, text=True,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "health_linkr.settings", "HEALTH_LINKR_APP_PROFILE": "api"},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        apps, middleware, status = json.loads(result.stdout.splitlines()[-1])
+
+        self.assertNotIn("django.contrib.admin", apps)
+        self.assertIn("jwt_authentication", apps)
+        self.assertIn("users_api", apps)
+        self.assertNotIn("django.contrib.sessions.middleware.SessionMiddleware", middleware)
+        self.assertNotIn("django.middleware.csrf.CsrfViewMiddleware", middleware)
+        self.assertEqual(status, 401)
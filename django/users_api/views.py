@@ -11,6 +11,8 @@ from django.contrib.auth import get_user_model
 from django.forms.models import model_to_dict
 from django.http import JsonResponse
 from jwt_authentication.decorators import jwt_required
+from jwt_authentication.passwords import PasswordHasherPool, PasswordHashingBusy
+from jwt_authentication.views import password_hashing_busy_response
 from django.conf import settings
 
 User = get_user_model()
@@ -27,7 +29,7 @@ def signup(request):
         if role is not None:
             group = Group.objects.get(name=role)
 
-        user = User.objects.create_user(username=username, password=password)
+        user = PasswordHasherPool.create_user(username=username, password=password)
         if group is not None:
             user.groups.add(group)
 
@@ -41,6 +43,8 @@ def signup(request):
             "message": "invalid role",
             "status": "bad-request"
         }, status=400)
+    except PasswordHashingBusy:
+        return password_hashing_busy_response()
     except (ValueError, ValidationError, IntegrityError) as e:
         return JsonResponse({
             "error": "Data Invalid",